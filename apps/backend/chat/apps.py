@@ -1,6 +1,7 @@
 from django.apps import AppConfig
 from django.conf import settings
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -12,7 +13,7 @@ class ChatConfig(AppConfig):
     def ready(self):
         """Initialize the chat agent when the app is ready."""
         from .providers import ChatAgentProvider
-        from .tool_selections.product_search import create_product_search_agent
+        from .tool_selections import create_chat_agent
 
         logger.debug("Initializing chat agent...")
         api_key = getattr(settings, 'OPENAI_API_KEY', '')
@@ -25,11 +26,27 @@ class ChatConfig(AppConfig):
         else:
             if api_key:
                 logger.debug("Creating LangChain agent")
-                agent = create_product_search_agent(api_key)
+                agent = create_chat_agent(api_key)
                 logger.debug("Setting agent in provider")
                 ChatAgentProvider.set_agent(agent)
                 logger.debug("Agent setup complete")
+
+                if getattr(settings, 'EMBEDDING_MODEL_WARMUP', True):
+                    self.warmup_embedding_models()
             else:
                 import warnings
                 logger.warning("OPENAI_API_KEY not set. Chat functionality will be limited.")
                 warnings.warn("OPENAI_API_KEY not set. Chat functionality will be limited.")
+
+    def warmup_embedding_models(self):
+        """Load the embedding models in a background thread so the first search is fast."""
+        from products.services import EmbeddingModelRegistry
+
+        def warmup():
+            try:
+                EmbeddingModelRegistry.warmup()
+                logger.debug(f"Embedding models warmed up: {EmbeddingModelRegistry.stats()}")
+            except Exception as e:
+                logger.error(f"Error warming up embedding models: {str(e)}")
+
+        threading.Thread(target=warmup, name="embedding-warmup", daemon=True).start()
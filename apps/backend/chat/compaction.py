@@ -0,0 +1,120 @@
+from typing import List, Optional, Tuple
+from django.conf import settings
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from config.metrics import Histogram
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separator tokens OpenAI adds per chat message
+
+PROMPT_TOKENS = Histogram(
+    "chat_prompt_history_tokens",
+    "Tokens of conversation history sent to the agent per turn",
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.encoding_for_model("gpt-4")
+                except Exception as e:
+                    logger.warning(f"tiktoken unavailable, estimating tokens from length: {str(e)}")
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the GPT-4 tokenizer (about 4 characters per token without tiktoken)"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return count_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def history_tokens(messages: List[BaseMessage]) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def is_summary(message: BaseMessage) -> bool:
+    return isinstance(message, SystemMessage) and str(message.content).startswith(SUMMARY_PREFIX)
+
+
+def trim_history(messages: List[BaseMessage], budget: int) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+    """Keep the newest messages that fit in the token budget
+
+    Leading system messages (the system prompt and any running summary) are
+    always kept, as is the newest message. Returns (kept, evicted).
+    """
+    pinned_count = 0
+    while pinned_count < len(messages) and isinstance(messages[pinned_count], SystemMessage):
+        pinned_count += 1
+    pinned, rest = messages[:pinned_count], messages[pinned_count:]
+
+    remaining = budget - history_tokens(pinned)
+    kept: List[BaseMessage] = []
+    for message in reversed(rest):
+        cost = message_tokens(message)
+        if kept and cost > remaining:
+            break
+        kept.append(message)
+        remaining -= cost
+    kept.reverse()
+
+    return pinned + kept, rest[:len(rest) - len(kept)]
+
+
+_summary_llm = None
+
+
+def get_summary_llm():
+    """Get the process-wide LLM used for rolling summaries (CHAT_SUMMARY_MODEL)"""
+    global _summary_llm
+    if _summary_llm is None:
+        from .tool_selections.product_search import create_llm
+
+        _summary_llm = create_llm(
+            getattr(settings, 'OPENAI_API_KEY', ''),
+            model=getattr(settings, 'CHAT_SUMMARY_MODEL', 'gpt-3.5-turbo')
+        )
+    return _summary_llm
+
+
+async def summarize(evicted: List[BaseMessage], previous_summary: Optional[str] = None, llm=None) -> str:
+    """Fold evicted turns into the running conversation summary"""
+    llm = llm or get_summary_llm()
+    roles = {HumanMessage: "User", AIMessage: "Assistant"}
+    transcript = "\n".join(
+        f"{roles.get(type(message), 'System')}: {message.content}" for message in evicted
+    )
+    prompt = (
+        "Update the running summary of this shopping conversation with the new messages. "
+        "Keep product names, prices, filters and user preferences; drop pleasantries. "
+        "Reply with the summary only, in at most 120 words.\n\n"
+        f"Current summary: {previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+    )
+    response = await llm.ainvoke([HumanMessage(content=prompt)])
+    return str(response.content).strip()
+
+
+def with_summary(messages: List[BaseMessage], summary: str) -> List[BaseMessage]:
+    """Return messages with the running summary placed right after the system prompt"""
+    messages = [message for message in messages if not is_summary(message)]
+    summary_message = SystemMessage(content=f"{SUMMARY_PREFIX} {summary}")
+    # After the system prompt if there is one (any summary was filtered out above)
+    position = 1 if messages and isinstance(messages[0], SystemMessage) else 0
+    return messages[:position] + [summary_message] + messages[position:]
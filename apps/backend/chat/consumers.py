@@ -1,7 +1,24 @@
 from typing import List, Dict, Any, Optional, Union
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from langchain.schema import HumanMessage, AIMessage, SystemMessage
-from .tool_selections import create_product_search_agent
+from langchain.schema import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from .tool_selections import create_chat_agent, search_products
+from .tool_selections.refinement import (
+    ResultSet, SearchResultRecorder, current_result_recorder, parse_refinement
+)
+from .tool_selections.retrieval import compact_results
+from .speculation import SpeculativeSearch, current_speculative_search
+from .streaming import WebSocketStreamingHandler
+from .providers import ChatAgentProvider
+from .instrumentation import LLMTimingHandler, ToolExecutionRecorder
+from .persistence import MAX_SESSION_ID_LENGTH, ChatLogBuffer
+from .history import get_history_store
+from .response_cache import ResponseCache
+from .compaction import (
+    PROMPT_TOKENS, SUMMARY_PREFIX, history_tokens, is_summary, summarize, trim_history, with_summary
+)
+from config.metrics import Counter, collect_timings, span
+from django.conf import settings
+import functools
 import json
 import logging
 import os
@@ -10,44 +27,142 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+INBOX_REJECTED = Counter(
+    "chat_inbox_rejected_total",
+    "Messages rejected with a busy frame because the connection inbox was full"
+)
+CANCELLED_WORK = Counter(
+    "chat_cancelled_work_total",
+    "Turns, queued messages and summaries abandoned because the client disconnected",
+    labelnames=("kind",)
+)
+MESSAGES_COALESCED = Counter(
+    "chat_messages_coalesced_total",
+    "Queued user messages merged into a preceding agent turn"
+)
+
 class ChatConsumer(AsyncJsonWebsocketConsumer):
     """WebSocket consumer for chat interactions"""
 
     async def connect(self):
         """Handle WebSocket connection"""
         session_id = self.scope["query_string"].decode().split("=")[1]
-        if not session_id:
+        if not session_id or len(session_id) > MAX_SESSION_ID_LENGTH:
             await self.close(code=4001)
             return
 
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            await self.close(code=4001)
-            return
+        # Reuse the process-wide agent (and its HTTP connection pool)
+        self.agent = ChatAgentProvider.get_agent()
+        if self.agent is None:
+            api_key = getattr(settings, 'OPENAI_API_KEY', '') or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                await self.close(code=4001)
+                return
+            self.agent = ChatAgentProvider.get_or_create_agent(
+                lambda: create_chat_agent(api_key)
+            )
 
         self.session_id = session_id
-        self.agent = create_product_search_agent(api_key)
-        self.message_history: List[Union[SystemMessage, HumanMessage, AIMessage]] = []
+        self.history_store = get_history_store()
+        # Loaded lazily from the history store on the first message
+        self.message_history: Optional[List[Union[SystemMessage, HumanMessage, AIMessage]]] = None
         self.last_system_prompt = None
         self.is_processing = False
+        self.disconnected = False
+        # Background rolling-summary update, cancelled on disconnect
+        self.summary_task: Optional[asyncio.Future] = None
+        # Candidates from the last product search, for in-memory follow-up refinement
+        self.result_set: Optional[ResultSet] = None
+        # Messages wait here while a turn runs; a single worker keeps them in order
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=getattr(settings, 'CHAT_INBOX_SIZE', 5))
+        self.inbox_worker = asyncio.ensure_future(self.process_inbox())
 
         await self.accept()
         logger.info(f"WebSocket connected for session {session_id}")
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
-        logger.info(f"WebSocket disconnected for session {self.session_id} with code {close_code}")
-        self.message_history = []
+        logger.info(f"WebSocket disconnected for session {getattr(self, 'session_id', None)} with code {close_code}")
+        await self.cancel_pending_work()
+        # History stays in the store so a reconnect (to any worker) resumes the session
+        self.message_history = None
         self.last_system_prompt = None
-        self.is_processing = False
+
+    async def cancel_pending_work(self):
+        """Stop work for a client that is gone: queued messages and the running turn"""
+        self.disconnected = True
+        inbox = getattr(self, 'inbox', None)
+        if inbox is not None:
+            dropped = 0
+            while not inbox.empty():
+                inbox.get_nowait()
+                dropped += 1
+            if dropped:
+                CANCELLED_WORK.inc(dropped, kind="queued_message")
+
+        summary_task = getattr(self, 'summary_task', None)
+        if summary_task is not None and not summary_task.done():
+            CANCELLED_WORK.inc(kind="summary")
+            summary_task.cancel()
+            await asyncio.gather(summary_task, return_exceptions=True)
+
+        worker = getattr(self, 'inbox_worker', None)
+        if worker is None or worker.done():
+            return
+        if self.is_processing:
+            # Cancellation reaches the LLM request and any search still queued on the pools
+            CANCELLED_WORK.inc(kind="turn")
+            logger.info(f"Cancelling in-flight turn for session {self.session_id}")
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    async def load_history(self):
+        """Load the session's history from the store on first use"""
+        if self.message_history is not None:
+            return
+        try:
+            self.message_history = await self.history_store.load(self.session_id)
+        except Exception as e:
+            logger.error(f"Error loading history for session {self.session_id}: {str(e)}")
+            self.message_history = []
+        if self.has_system_prompt():
+            self.last_system_prompt = self.message_history[0].content
+
+    def has_system_prompt(self) -> bool:
+        """Whether history starts with the widget's system prompt (not the running summary)"""
+        return bool(self.message_history) \
+            and isinstance(self.message_history[0], SystemMessage) \
+            and not is_summary(self.message_history[0])
+
+    async def summarize_evicted(self, evicted: List[BaseMessage], previous_task: Optional[asyncio.Future] = None):
+        """Fold evicted turns into the running summary in the background"""
+        if previous_task is not None:
+            # Summaries build on each other, so run them one after another
+            await asyncio.gather(previous_task, return_exceptions=True)
+        try:
+            previous = next((m for m in self.message_history or [] if is_summary(m)), None)
+            previous_summary = previous.content[len(SUMMARY_PREFIX):].strip() if previous else None
+            summary = await summarize(evicted, previous_summary)
+        except Exception as e:
+            logger.error(f"Error summarizing history for session {self.session_id}: {str(e)}")
+            return
+
+        # The connection may have closed while the summary was generated
+        if self.message_history is None:
+            return
+        self.message_history = with_summary(self.message_history, summary)
+        await self.save_history()
+
+    async def save_history(self):
+        """Write the current history back to the store"""
+        try:
+            await self.history_store.save(self.session_id, self.message_history)
+        except Exception as e:
+            logger.error(f"Error saving history for session {self.session_id}: {str(e)}")
 
     async def receive_json(self, content):
         """Handle incoming WebSocket messages"""
         try:
-            if self.is_processing:
-                logger.warning(f"Ignoring message while processing: {content}")
-                return
-
             logger.debug(f"Received message: {content}")
 
             # Handle empty or invalid content
@@ -59,34 +174,29 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             # If message field exists, treat it as a chat message
             if "message" in content:
                 message = content["message"]
+                is_system_prompt = message.startswith("[SYSTEM PROMPT]")
 
-                # Handle system prompts by updating agent's system message
-                if message.startswith("[SYSTEM PROMPT]"):
-                    system_content = message.replace("[SYSTEM PROMPT]", "").strip()
-                    # Skip if it's the same as the last system prompt
-                    if system_content == self.last_system_prompt:
-                        return
-                    self.last_system_prompt = system_content
-                    self.message_history = [SystemMessage(content=system_content)]
+                if self.inbox.full():
+                    INBOX_REJECTED.inc()
+                    logger.warning(f"Inbox full for session {self.session_id}, rejecting message")
+                    await self.send_json({
+                        "type": "busy",
+                        "message": "Still working on your previous messages. Please wait a moment and try again.",
+                        "queued": self.inbox.qsize(),
+                        "timestamp": datetime.now().isoformat()
+                    })
                     return
 
-                # Echo back user message first
-                await self.send_json({
-                    "type": "message",
-                    "role": "user",
-                    "message": message,
-                    "timestamp": datetime.now().isoformat()
-                })
-
-                # Then process the message
-                self.is_processing = True
-                try:
-                    await self.handle_message(content)
-                except asyncio.CancelledError:
-                    logger.warning("Message processing was cancelled")
-                    await self.send_error("Message processing was cancelled")
-                finally:
-                    self.is_processing = False
+                # Queue first so the echo never races ahead of a rejection
+                self.inbox.put_nowait(content)
+                if not is_system_prompt:
+                    # Echo back user message first
+                    await self.send_json({
+                        "type": "message",
+                        "role": "user",
+                        "message": message,
+                        "timestamp": datetime.now().isoformat()
+                    })
             else:
                 logger.warning(f"Message content missing required 'message' field: {content}")
                 await self.send_error("Message content required")
@@ -94,7 +204,69 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error handling message: {str(e)}")
             await self.send_error(str(e))
-            self.is_processing = False
+
+    async def process_inbox(self):
+        """Process queued messages in order, one agent turn at a time"""
+        while True:
+            content = await self.inbox.get()
+
+            # Take everything that queued up during the previous turn
+            batch = [content]
+            window = getattr(settings, 'CHAT_COALESCE_WINDOW_MS', 0) / 1000
+            if window > 0:
+                await asyncio.sleep(window)
+            while not self.inbox.empty():
+                batch.append(self.inbox.get_nowait())
+
+            self.is_processing = True
+            try:
+                await self.load_history()
+                for group in self.coalesce(batch):
+                    if group["message"].startswith("[SYSTEM PROMPT]"):
+                        await self.apply_system_prompt(group["message"])
+                    else:
+                        await self.handle_message(group)
+            except asyncio.CancelledError:
+                logger.warning("Message processing was cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"Error processing messages: {str(e)}")
+                await self.send_error(str(e))
+            finally:
+                self.is_processing = False
+
+    @staticmethod
+    def coalesce(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge runs of consecutive user messages into single turns
+
+        System prompts are kept as separate entries so they apply in order.
+        """
+        groups: List[Dict[str, Any]] = []
+        for content in batch:
+            message = content["message"]
+            previous = groups[-1]["message"] if groups else None
+            if (
+                previous is not None
+                and not message.startswith("[SYSTEM PROMPT]")
+                and not previous.startswith("[SYSTEM PROMPT]")
+            ):
+                groups[-1] = {**groups[-1], "message": f"{previous}\n{message}"}
+                MESSAGES_COALESCED.inc()
+            else:
+                groups.append(content)
+        return groups
+
+    async def apply_system_prompt(self, message: str):
+        """Replace the system message, keeping the conversation so far"""
+        system_content = message.replace("[SYSTEM PROMPT]", "").strip()
+        # Skip if it's the same as the last system prompt
+        if system_content == self.last_system_prompt:
+            return
+        self.last_system_prompt = system_content
+        if self.has_system_prompt():
+            self.message_history = self.message_history[1:]
+        self.message_history = [SystemMessage(content=system_content)] + self.message_history
+        await self.save_history()
 
     async def handle_message(self, content: Dict[str, Any]):
         """Handle chat messages"""
@@ -103,91 +275,72 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             user_message = content["message"]
             self.message_history.append(HumanMessage(content=user_message))
 
-            # Keep only the last 10 messages
-            if len(self.message_history) > 10:
-                # Always keep the system message if it exists
-                if isinstance(self.message_history[0], SystemMessage):
-                    self.message_history = [self.message_history[0]] + self.message_history[-9:]
-                else:
-                    self.message_history = self.message_history[-10:]
+            # Keep the newest messages that fit the token budget
+            self.message_history, evicted = trim_history(
+                self.message_history,
+                getattr(settings, 'CHAT_HISTORY_TOKEN_BUDGET', 3000)
+            )
+            PROMPT_TOKENS.observe(history_tokens(self.message_history))
+            if evicted and getattr(settings, 'CHAT_HISTORY_SUMMARIZE', False):
+                self.summary_task = asyncio.ensure_future(self.summarize_evicted(evicted, self.summary_task))
 
-            # Run agent with direct product search
-            try:
-                result = await asyncio.wait_for(
-                    self.agent.ainvoke({
-                        "input": user_message,
-                        "chat_history": self.message_history
-                    }),
-                    timeout=60.0  # 60 second timeout
-                )
-            except asyncio.TimeoutError:
-                logger.error("Agent execution timed out")
-                await self.send_json({
-                    "type": "message",
-                    "role": "assistant",
-                    "message": "I apologize, but the search took too long. Please try again with a more specific query.",
-                    "timestamp": datetime.now().isoformat(),
-                    "metadata": {
-                        "error": "timeout",
-                        "tool_results": [{
-                            "tool": "product_search",
-                            "result": {
-                                "data": [],
-                                "metadata": {
-                                    "search_type": "hybrid",
-                                    "total_results": 0,
-                                    "error": "timeout"
-                                }
-                            }
-                        }]
-                    }
-                })
-                return
-            except asyncio.CancelledError:
-                logger.warning("Agent execution was cancelled")
-                await self.send_json({
-                    "type": "message",
-                    "role": "assistant",
-                    "message": "The search was interrupted. Please try again.",
-                    "timestamp": datetime.now().isoformat(),
-                    "metadata": {
-                        "error": "cancelled",
-                        "tool_results": [{
-                            "tool": "product_search",
-                            "result": {
-                                "data": [],
-                                "metadata": {
-                                    "search_type": "hybrid",
-                                    "total_results": 0,
-                                    "error": "cancelled"
-                                }
-                            }
-                        }]
-                    }
-                })
-                return
+            # Follow-ups like "only the cheaper ones" are answered from the last results
+            refined = self.refine_results(user_message)
 
-            # Extract agent response
-            agent_response = result.get("output", "")
-            tool_results = []
-
-            # Parse tool results if any
-            if "intermediate_steps" in result:
-                for action, tool_output in result["intermediate_steps"]:
-                    if isinstance(tool_output, str):
-                        try:
-                            # Parse the JSON string result
-                            search_data = json.loads(tool_output)
-                            tool_results.append({
-                                "tool": "product_search",
-                                "result": tool_output  # Keep raw JSON string for consistent parsing
-                            })
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Error parsing tool output: {str(e)}")
-                            logger.debug(f"Raw tool output: {tool_output}")
+            # Opening questions repeat across visitors; answer them from the response cache
+            use_response_cache = (
+                refined is None
+                and getattr(settings, 'CHAT_RESPONSE_CACHE', False)
+                and self.is_opening_turn()
+            )
+            cached = None
+            if use_response_cache:
+                cached = await ResponseCache.instance().lookup(self.last_system_prompt or "", user_message)
+
+            if refined is not None:
+                turn = refined
+            elif cached is not None:
+                turn = {**cached, "timings": {}, "tool_executions": []}
+            else:
+                turn = await self.run_agent(user_message)
+                if turn is None:
+                    return
+                turn["last_search"] = turn["searches"][-1] if turn["searches"] else None
+                if use_response_cache and turn["output"].strip():
+                    # Keep the candidates with the answer so follow-ups to a cached answer can be refined
+                    await ResponseCache.instance().store(
+                        self.last_system_prompt or "",
+                        user_message,
+                        {
+                            "output": turn["output"],
+                            "tool_results": turn["tool_results"],
+                            "last_search": turn["last_search"]
+                        }
+                    )
+            last_search = turn.get("last_search")
+            if last_search is not None:
+                self.result_set = ResultSet(
+                    last_search["query"],
+                    last_search["results"],
+                    page_size=last_search["page_size"]
+                )
 
             # Add agent response to history
+            agent_response = turn["output"]
             self.message_history.append(AIMessage(content=agent_response))
+            await self.save_history()
+
+            metadata = {
+                "context_used": True,
+                "confidence": 1.0,
+                "tool_results": turn["tool_results"]
+            }
+            if cached is not None:
+                metadata["cached"] = True
+            if refined is not None:
+                metadata["refined"] = True
+            if getattr(settings, 'CHAT_INCLUDE_TIMINGS', False):
+                metadata["timings"] = turn["timings"]
 
             # Send response
             await self.send_json({
@@ -195,17 +348,191 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
                 "role": "assistant",
                 "message": agent_response,
                 "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "context_used": True,
-                    "confidence": 1.0,
-                    "tool_results": tool_results
-                }
+                "metadata": metadata
             })
 
+            if getattr(settings, 'CHAT_LOG_ENABLED', True):
+                self.log_turn(user_message, agent_response, metadata, turn["tool_executions"])
+
         except Exception as e:
             logger.error(f"Error in chat: {str(e)}")
             await self.send_error(str(e))
 
+    def refine_results(self, user_message: str) -> Optional[Dict[str, Any]]:
+        """Answer a refinement of the last search from its candidates, or return None"""
+        if self.result_set is None or not getattr(settings, 'CHAT_REFINE_RESULTS', True):
+            return None
+        refinement = parse_refinement(user_message, self.result_set.categories())
+        if refinement is None:
+            return None
+
+        with collect_timings() as timings, span("refine"):
+            results = self.result_set.refine(refinement)
+        if results is None:
+            # Nothing left in the candidate set; search again
+            return None
+
+        metadata = results["metadata"]
+        output = (
+            f"Here are {metadata['total_results']} of the {metadata['matching_results']} matching products "
+            f"from your search for \"{self.result_set.query}\":\n{compact_results(results)}"
+        )
+        return {
+            "output": output,
+            "tool_results": [{"tool": "product_search", "result": json.dumps(results)}],
+            "timings": timings,
+            "tool_executions": []
+        }
+
+    def is_opening_turn(self) -> bool:
+        """Whether the newest message is the first of the conversation"""
+        return sum(1 for message in self.message_history if not isinstance(message, SystemMessage)) == 1 \
+            and not any(is_summary(message) for message in self.message_history)
+
+    async def run_agent(self, user_message: str) -> Optional[Dict[str, Any]]:
+        """Run one agent turn, or return None after reporting a timeout or interruption"""
+        try:
+            # Stream token deltas, tool events and tool results while the agent runs
+            tool_recorder = ToolExecutionRecorder()
+            callbacks = [LLMTimingHandler(), tool_recorder]
+            stream_tokens = getattr(settings, 'CHAT_STREAMING', True)
+            send_tool_results = getattr(settings, 'CHAT_EARLY_TOOL_RESULTS', True)
+            if stream_tokens or send_tool_results:
+                callbacks.append(WebSocketStreamingHandler(
+                    self.send_json,
+                    stream_tokens=stream_tokens,
+                    send_tool_results=send_tool_results
+                ))
+
+            # Keep the turn's search candidates so follow-ups can be refined locally
+            recorder = None
+            if getattr(settings, 'CHAT_REFINE_RESULTS', True):
+                recorder = SearchResultRecorder(
+                    candidates=getattr(settings, 'CHAT_REFINE_CANDIDATES', 30),
+                    page_size=getattr(settings, 'CHAT_REFINE_PAGE_SIZE', 10)
+                )
+            recorder_token = current_result_recorder.set(recorder)
+
+            # Optionally search with the raw message while the agent decides
+            speculative = None
+            if getattr(settings, 'CHAT_SPECULATIVE_SEARCH', False):
+                speculative = SpeculativeSearch(
+                    user_message,
+                    functools.partial(search_products, limit=recorder.candidates if recorder else 10),
+                    similarity_threshold=getattr(settings, 'CHAT_SPECULATIVE_SIMILARITY', 0.9)
+                )
+            speculation_token = current_speculative_search.set(speculative)
+
+            try:
+                with collect_timings() as timings, span("agent"):
+                    result = await asyncio.wait_for(
+                        self.agent.ainvoke(
+                            {
+                                "input": user_message,
+                                "chat_history": self.message_history
+                            },
+                            config={"callbacks": callbacks}
+                        ),
+                        timeout=60.0  # 60 second timeout
+                    )
+            finally:
+                current_result_recorder.reset(recorder_token)
+                current_speculative_search.reset(speculation_token)
+                if speculative is not None:
+                    speculative.finish()
+        except asyncio.TimeoutError:
+            logger.error("Agent execution timed out")
+            await self.send_json({
+                "type": "message",
+                "role": "assistant",
+                "message": "I apologize, but the search took too long. Please try again with a more specific query.",
+                "timestamp": datetime.now().isoformat(),
+                "metadata": {
+                    "error": "timeout",
+                    "tool_results": [{
+                        "tool": "product_search",
+                        "result": {
+                            "data": [],
+                            "metadata": {
+                                "search_type": "hybrid",
+                                "total_results": 0,
+                                "error": "timeout"
+                            }
+                        }
+                    }]
+                }
+            })
+            return None
+        except asyncio.CancelledError:
+            if getattr(self, 'disconnected', False):
+                # Nobody to answer; let the cancellation unwind the worker
+                raise
+            logger.warning("Agent execution was cancelled")
+            await self.send_json({
+                "type": "message",
+                "role": "assistant",
+                "message": "The search was interrupted. Please try again.",
+                "timestamp": datetime.now().isoformat(),
+                "metadata": {
+                    "error": "cancelled",
+                    "tool_results": [{
+                        "tool": "product_search",
+                        "result": {
+                            "data": [],
+                            "metadata": {
+                                "search_type": "hybrid",
+                                "total_results": 0,
+                                "error": "cancelled"
+                            }
+                        }
+                    }]
+                }
+            })
+            return None
+
+        # Parse tool results if any
+        tool_results = []
+        if "intermediate_steps" in result:
+            for action, tool_output in result["intermediate_steps"]:
+                if isinstance(tool_output, str):
+                    try:
+                        # Parse the JSON string result
+                        search_data = json.loads(tool_output)
+                        tool_results.append({
+                            "tool": "product_search",
+                            "result": tool_output  # Keep raw JSON string for consistent parsing
+                        })
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Error parsing tool output: {str(e)}")
+                        logger.debug(f"Raw tool output: {tool_output}")
+
+        return {
+            "output": result.get("output", ""),
+            "tool_results": tool_results,
+            "timings": timings,
+            "tool_executions": tool_recorder.executions,
+            "searches": recorder.searches if recorder is not None else []
+        }
+
+    def log_turn(self, user_message: str, agent_response: str, metadata: Dict[str, Any], tool_executions: List[Dict[str, Any]]):
+        """Queue the turn's messages and tool executions for batched persistence"""
+        log = ChatLogBuffer.instance()
+        log.add_message(self.session_id, "user", user_message)
+        if not agent_response.strip():
+            return
+
+        # Tool outputs are stored on ToolExecution rather than repeated in message metadata
+        message_metadata = {key: value for key, value in metadata.items() if key != "tool_results"}
+        message_id = log.add_message(self.session_id, "assistant", agent_response, message_metadata)
+        for execution in tool_executions:
+            log.add_tool_execution(message_id, **execution)
+
+    @classmethod
+    async def encode_json(cls, content):
+        """Encode outgoing frames, timed as the json_encode stage"""
+        with span("json_encode"):
+            return await super().encode_json(content)
+
     async def send_error(self, error: str):
         """Send error message to client"""
         await self.send_json({
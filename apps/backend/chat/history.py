@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from products.cache import LRUCache, get_redis_client
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Compact one-letter role codes for serialized history
+_ROLE_CODES = {SystemMessage: "s", HumanMessage: "h", AIMessage: "a"}
+_CODE_TYPES = {code: message_type for message_type, code in _ROLE_CODES.items()}
+
+
+def serialize_history(messages: List[BaseMessage]) -> str:
+    """Serialize messages as a compact JSON list of [role_code, content] pairs"""
+    return json.dumps(
+        [[_ROLE_CODES[type(message)], message.content] for message in messages if type(message) in _ROLE_CODES],
+        separators=(",", ":")
+    )
+
+
+def deserialize_history(data) -> List[BaseMessage]:
+    """Inverse of serialize_history"""
+    return [_CODE_TYPES[code](content=content) for code, content in json.loads(data)]
+
+
+class HistoryStore(ABC):
+    """Conversation history keyed by session_id, bounded to the most recent messages"""
+
+    def __init__(self, max_messages: int = 50, ttl: int = 24 * 60 * 60):
+        self.max_messages = max_messages
+        self.ttl = ttl
+
+    def _bounded(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        if len(messages) <= self.max_messages:
+            return messages
+        # Keep the leading system messages (system prompt, running summary) when trimming
+        pinned = 0
+        while pinned < len(messages) and isinstance(messages[pinned], SystemMessage):
+            pinned += 1
+        if pinned >= self.max_messages:
+            return messages[:pinned]
+        return messages[:pinned] + messages[pinned:][-(self.max_messages - pinned):]
+
+    @abstractmethod
+    async def load(self, session_id: str) -> List[BaseMessage]:
+        """Load the session's messages, oldest first"""
+
+    @abstractmethod
+    async def save(self, session_id: str, messages: List[BaseMessage]):
+        """Store the session's messages"""
+
+    @abstractmethod
+    async def clear(self, session_id: str):
+        """Forget the session"""
+
+
+class InMemoryHistoryStore(HistoryStore):
+    """Process-local store; only survives reconnects served by the same worker"""
+
+    def __init__(self, max_messages: int = 50, ttl: int = 24 * 60 * 60, max_sessions: int = 10000):
+        super().__init__(max_messages, ttl)
+        self._sessions = LRUCache(max_size=max_sessions, ttl=ttl)
+
+    async def load(self, session_id: str) -> List[BaseMessage]:
+        data = self._sessions.get(session_id)
+        return deserialize_history(data) if data else []
+
+    async def save(self, session_id: str, messages: List[BaseMessage]):
+        self._sessions.set(session_id, serialize_history(self._bounded(messages)))
+
+    async def clear(self, session_id: str):
+        self._sessions.delete(session_id)
+
+
+class RedisHistoryStore(HistoryStore):
+    """Shared store in the Redis used by CHANNEL_LAYERS, so any worker can serve a session"""
+
+    def _key(self, session_id: str) -> str:
+        return f"chat:history:{session_id}"
+
+    async def load(self, session_id: str) -> List[BaseMessage]:
+        data = await sync_to_async(get_redis_client().get, thread_sensitive=False)(self._key(session_id))
+        return deserialize_history(data) if data else []
+
+    async def save(self, session_id: str, messages: List[BaseMessage]):
+        await sync_to_async(get_redis_client().set, thread_sensitive=False)(
+            self._key(session_id), serialize_history(self._bounded(messages)), ex=self.ttl
+        )
+
+    async def clear(self, session_id: str):
+        await sync_to_async(get_redis_client().delete, thread_sensitive=False)(self._key(session_id))
+
+
+class DatabaseHistoryStore(HistoryStore):
+    """Rebuilds history from the persisted Message table.
+
+    Turns are written by ChatLogBuffer, so save is a no-op and the most
+    recent turn may be missing until the buffer flushes. System prompts are
+    not persisted; the widget resends them on connect.
+    """
+
+    @database_sync_to_async
+    def _load(self, session_id: str) -> List[BaseMessage]:
+        from .models import Message
+
+        rows = list(
+            Message.objects.filter(session__session_id=session_id)
+            .order_by('-created_at')
+            .values_list('role', 'content')[:self.max_messages]
+        )
+        types = {"user": HumanMessage, "assistant": AIMessage, "system": SystemMessage}
+        return [types[role](content=content) for role, content in reversed(rows)]
+
+    async def load(self, session_id: str) -> List[BaseMessage]:
+        return await self._load(session_id)
+
+    async def save(self, session_id: str, messages: List[BaseMessage]):
+        pass
+
+    async def clear(self, session_id: str):
+        pass
+
+
+_store: Optional[HistoryStore] = None
+
+
+def get_history_store() -> HistoryStore:
+    """Get the process-wide store selected by CHAT_HISTORY_STORE ('memory', 'redis' or 'database')"""
+    global _store
+    if _store is None:
+        backend = getattr(settings, 'CHAT_HISTORY_STORE', 'memory')
+        options = {
+            "max_messages": getattr(settings, 'CHAT_HISTORY_MAX_MESSAGES', 50),
+            "ttl": getattr(settings, 'CHAT_HISTORY_TTL', 24 * 60 * 60),
+        }
+        if backend == 'redis' and get_redis_client() is not None:
+            _store = RedisHistoryStore(**options)
+        elif backend == 'database':
+            _store = DatabaseHistoryStore(**options)
+        else:
+            if backend != 'memory':
+                logger.warning(f"History store '{backend}' unavailable, using in-memory history")
+            _store = InMemoryHistoryStore(**options)
+    return _store
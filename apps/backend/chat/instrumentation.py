@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langchain.callbacks.base import AsyncCallbackHandler
+from config.metrics import record_stage
+import json
+import time
+
+
+class LLMTimingHandler(AsyncCallbackHandler):
+    """Records the duration of every LLM call made during an agent run as the 'llm' stage."""
+
+    def __init__(self):
+        self._started: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def _finish(self, run_id: UUID):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            record_stage("llm", time.perf_counter() - started)
+
+
+class ToolExecutionRecorder(AsyncCallbackHandler):
+    """Captures input, output, error and duration of each tool call for persistence."""
+
+    def __init__(self):
+        self.executions: List[Dict[str, Any]] = []
+        self._started: Dict[UUID, Dict[str, Any]] = {}
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = {
+            "tool_name": (serialized or {}).get("name", "unknown"),
+            # Structured tools report their arguments in inputs
+            "input_data": kwargs.get("inputs") or {"query": input_str},
+            "started": time.perf_counter()
+        }
+
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, output=output)
+
+    async def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=str(error))
+
+    def _finish(self, run_id: UUID, output: Any = None, error: Optional[str] = None):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+
+        try:
+            output_data = json.loads(output) if isinstance(output, str) else output
+        except json.JSONDecodeError:
+            output_data = {"raw": output}
+
+        self.executions.append({
+            "tool_name": started["tool_name"],
+            "input_data": started["input_data"],
+            "output_data": output_data if output_data is not None else {},
+            "error": error,
+            "execution_time": (time.perf_counter() - started["started"]) * 1000
+        })
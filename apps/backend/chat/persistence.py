@@ -0,0 +1,190 @@
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from config.metrics import register_collector
+from .models import ChatSession, Message, ToolExecution
+import atexit
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 10000  # Mirrors Message.clean, which bulk_create skips
+MAX_SESSION_ID_LENGTH = 100  # Mirrors ChatSession.session_id
+
+
+class ChatLogBuffer:
+    """Write-behind buffer that persists chat messages and tool executions in batches.
+
+    The consumer only appends to in-memory lists; a background thread writes
+    them with bulk_create when CHAT_LOG_BUFFER_SIZE records are pending or
+    every CHAT_LOG_FLUSH_INTERVAL seconds, keeping INSERTs off the chat path.
+    """
+    _instance: Optional["ChatLogBuffer"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "ChatLogBuffer":
+        """Get the process-wide buffer, starting its flush thread on first use"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_size=getattr(settings, 'CHAT_LOG_BUFFER_SIZE', 100),
+                        flush_interval=getattr(settings, 'CHAT_LOG_FLUSH_INTERVAL', 2.0)
+                    )
+                    atexit.register(cls._instance.flush)
+        return cls._instance
+
+    def __init__(self, max_size: int = 100, flush_interval: float = 2.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._messages: List[Dict[str, Any]] = []
+        self._tool_executions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stats = {"messages_written": 0, "tool_executions_written": 0, "flushes": 0, "flush_errors": 0}
+        self._thread = threading.Thread(target=self._run, name="chat-log-flush", daemon=True)
+        self._thread.start()
+
+    def add_message(self, session_id: str, role: str, content: str, metadata: Dict[str, Any] = None) -> uuid.UUID:
+        """Queue a message and return the id it will be stored under"""
+        message_id = uuid.uuid4()
+        with self._lock:
+            self._messages.append({
+                "id": message_id,
+                "session_id": session_id[:MAX_SESSION_ID_LENGTH],
+                "role": role,
+                "content": content[:MAX_CONTENT_LENGTH],
+                "metadata": metadata
+            })
+        self._maybe_wake()
+        return message_id
+
+    def add_tool_execution(
+        self,
+        message_id: uuid.UUID,
+        tool_name: str,
+        input_data: Any,
+        output_data: Any,
+        execution_time: float,
+        error: str = None
+    ):
+        """Queue a tool execution (execution_time in milliseconds) for a queued message"""
+        with self._lock:
+            self._tool_executions.append({
+                "message_id": message_id,
+                "tool_name": tool_name,
+                "input_data": input_data,
+                "output_data": output_data,
+                "execution_time": execution_time,
+                "error": error
+            })
+        self._maybe_wake()
+
+    def pending(self) -> int:
+        """Number of records waiting to be written"""
+        return len(self._messages) + len(self._tool_executions)
+
+    def _maybe_wake(self):
+        if self.pending() >= self.max_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all pending records; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                messages, self._messages = self._messages, []
+                tool_executions, self._tool_executions = self._tool_executions, []
+            if not messages and not tool_executions:
+                return 0
+
+            close_old_connections()
+            try:
+                try:
+                    self._write(messages, tool_executions)
+                    written = [(messages, tool_executions)]
+                except Exception as e:
+                    # Keep one bad record from dropping every session's logs
+                    logger.warning(f"Error writing batch, retrying session by session: {str(e)}")
+                    written = self._write_by_session(messages, tool_executions)
+            finally:
+                close_old_connections()
+
+            if not written:
+                return 0
+            messages_written = sum(len(session_messages) for session_messages, _ in written)
+            tool_executions_written = sum(len(session_executions) for _, session_executions in written)
+            self._stats["flushes"] += 1
+            self._stats["messages_written"] += messages_written
+            self._stats["tool_executions_written"] += tool_executions_written
+            return messages_written + tool_executions_written
+
+    def _write_by_session(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_executions: List[Dict[str, Any]]
+    ) -> List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Write each session's records in its own transaction; returns the groups written"""
+        message_sessions = {message["id"]: message["session_id"] for message in messages}
+        groups: Dict[Optional[str], Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+        for message in messages:
+            groups.setdefault(message["session_id"], ([], []))[0].append(message)
+        for execution in tool_executions:
+            # Executions whose message was written by an earlier flush form their own group
+            groups.setdefault(message_sessions.get(execution["message_id"]), ([], []))[1].append(execution)
+
+        written = []
+        for session_id, (session_messages, session_executions) in groups.items():
+            try:
+                self._write(session_messages, session_executions)
+            except Exception as e:
+                # Dropped rather than retried so a broken database cannot grow the buffer
+                logger.error(
+                    f"Error writing {len(session_messages)} messages and {len(session_executions)} "
+                    f"tool executions for session {session_id}: {str(e)}"
+                )
+                self._stats["flush_errors"] += 1
+            else:
+                written.append((session_messages, session_executions))
+        return written
+
+    def _write(self, messages: List[Dict[str, Any]], tool_executions: List[Dict[str, Any]]):
+        with transaction.atomic():
+            session_ids = {message["session_id"] for message in messages}
+            ChatSession.objects.bulk_create(
+                [ChatSession(session_id=session_id) for session_id in session_ids],
+                ignore_conflicts=True
+            )
+            sessions = dict(
+                ChatSession.objects.filter(session_id__in=session_ids).values_list('session_id', 'id')
+            )
+
+            Message.objects.bulk_create([
+                Message(
+                    id=message["id"],
+                    session_id=sessions[message["session_id"]],
+                    role=message["role"],
+                    content=message["content"],
+                    metadata=message["metadata"]
+                )
+                for message in messages
+            ])
+            ToolExecution.objects.bulk_create([
+                ToolExecution(**execution) for execution in tool_executions
+            ])
+
+    def stats(self) -> Dict[str, int]:
+        """Get write counters and the number of pending records"""
+        return {**self._stats, "pending": self.pending()}
+
+
+register_collector("chat_log", lambda: ChatLogBuffer.instance().stats() if ChatLogBuffer._instance else {})
@@ -1,9 +1,11 @@
-from typing import Optional
+from typing import Callable, Optional
 from langchain.agents import AgentExecutor
+import threading
 
 class ChatAgentProvider:
     """Provider for managing the chat agent instance."""
     _instance: Optional[AgentExecutor] = None
+    _lock = threading.Lock()
 
     @classmethod
     def get_agent(cls) -> Optional[AgentExecutor]:
@@ -15,5 +17,18 @@ class ChatAgentProvider:
         """Set the agent instance"""
         cls._instance = agent
 
+    @classmethod
+    def get_or_create_agent(cls, factory: Callable[[], AgentExecutor]) -> AgentExecutor:
+        """Get the shared agent, creating it once with factory if none is set.
+
+        The executor is stateless (history is passed per call), so one instance
+        and its HTTP connection pool can serve every WebSocket connection.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = factory()
+        return cls._instance
+
 # The agent instance will be set by the app config
 chat_agent = None
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from config.metrics import register_collector
+from products.cache import CatalogVersion
+from products.services import ProductSearchService, SearchExecutors, normalize_query
+from .tool_selections.filters import known_categories, parse_search_filters
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Assistant answers to opening questions, reused for near-duplicate questions
+
+    Entries are grouped by a hash of the system prompt, the catalog version
+    and the price bounds and category parsed from the question, so a product
+    change (which bumps the version) makes older answers unreachable and
+    "desks under $200" never matches "desks under $500". Within a group the
+    exact question is served directly;
+    otherwise the nearest cached question is served when its embedding
+    similarity clears the threshold. Entries live in-process because the
+    similarity scan needs the embeddings locally.
+    """
+    _instance: Optional["ResponseCache"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "ResponseCache":
+        """Get the process-wide response cache"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_entries=getattr(settings, 'CHAT_RESPONSE_CACHE_SIZE', 512),
+                        # Keep well below MINIO_SIGNED_URL_TTL_HOURS: cached tool results carry signed URLs
+                        ttl=getattr(settings, 'CHAT_RESPONSE_CACHE_TTL', 15 * 60),
+                        similarity_threshold=getattr(settings, 'CHAT_RESPONSE_CACHE_SIMILARITY', 0.95)
+                    )
+        return cls._instance
+
+    def __init__(self, max_entries: int = 512, ttl: float = 15 * 60, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        # (group, normalized question) -> (embedding, response, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    @staticmethod
+    def _group(system_prompt: str, message: str) -> str:
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+        filters = parse_search_filters(message, known_categories())
+        constraints = f"{filters['category']}:{filters['min_price']}:{filters['max_price']}"
+        return f"{prompt_hash}:{CatalogVersion.get()}:{constraints}"
+
+    @staticmethod
+    def _embed(question: str) -> np.ndarray:
+        # Shares the embedding cache with product search, so a miss here warms the search
+        return np.asarray(ProductSearchService()._get_text_embedding(question), dtype=np.float32)
+
+    def _lookup(self, system_prompt: str, message: str) -> Optional[Dict[str, Any]]:
+        group = self._group(system_prompt, message)
+        question = normalize_query(message)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get((group, question))
+            if entry is not None and entry[2] >= now:
+                self._entries.move_to_end((group, question))
+                self._counts["exact_hits"] += 1
+                return entry[1]
+
+        embedding = self._embed(question)
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if key[0] == group and entry[2] >= now
+            ]
+            if candidates:
+                # Embeddings are L2-normalized, so the dot product is the cosine similarity
+                similarities = np.stack([entry[0] for _, entry in candidates]) @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self._counts["similar_hits"] += 1
+                    return entry[1]
+            self._counts["misses"] += 1
+        return None
+
+    def _store(self, system_prompt: str, message: str, response: Dict[str, Any]):
+        group = self._group(system_prompt, message)
+        question = normalize_query(message)
+        embedding = self._embed(question)
+
+        with self._lock:
+            now = time.monotonic()
+            self._entries[(group, question)] = (embedding, response, now + self.ttl)
+            self._entries.move_to_end((group, question))
+            # Drop expired entries first, then the least recently used
+            for key in [key for key, entry in self._entries.items() if entry[2] < now]:
+                del self._entries[key]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._counts["stores"] += 1
+
+    async def lookup(self, system_prompt: str, message: str) -> Optional[Dict[str, Any]]:
+        """Get the cached response for message, or None"""
+        try:
+            return await SearchExecutors.run('embedding', self._lookup, system_prompt, message)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {str(e)}")
+            self._counts["errors"] += 1
+            return None
+
+    async def store(self, system_prompt: str, message: str, response: Dict[str, Any]):
+        """Cache the response to message"""
+        try:
+            await SearchExecutors.run('embedding', self._store, system_prompt, message, response)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {str(e)}")
+            self._counts["errors"] += 1
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters, the hit rate and the number of entries"""
+        with self._lock:
+            stats: Dict[str, float] = {**self._counts, "size": len(self._entries)}
+        hits = stats["exact_hits"] + stats["similar_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+register_collector("response_cache", lambda: ResponseCache.instance().stats())
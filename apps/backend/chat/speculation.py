@@ -0,0 +1,103 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import threading
+from config.metrics import register_collector
+from products.services import ProductSearchService, SearchExecutors, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Speculative search for the agent turn running in the current context
+current_speculative_search: ContextVar[Optional["SpeculativeSearch"]] = ContextVar(
+    "current_speculative_search", default=None
+)
+
+
+class SpeculativeSearch:
+    """Product search started with the raw user message while the agent decides.
+
+    When the agent's product_search call asks for (nearly) the same query, the
+    tool is served from this result instead of searching again; otherwise the
+    speculative task is cancelled when the turn ends.
+    """
+    _lock = threading.Lock()
+    _stats = {"started": 0, "exact_hits": 0, "similar_hits": 0, "misses": 0, "unused": 0}
+
+    def __init__(
+        self,
+        query: str,
+        search: Callable[[str], Awaitable[Dict[str, Any]]],
+        similarity_threshold: float = 0.9
+    ):
+        self.query = query
+        self.similarity_threshold = similarity_threshold
+        self.used = False
+        self.task = asyncio.ensure_future(search(query))
+        self.task.add_done_callback(self._retrieve_exception)
+        self._record("started")
+
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Future):
+        # An unused speculation's error is never awaited; reading it stops
+        # asyncio logging "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    @classmethod
+    def _record(cls, key: str):
+        with cls._lock:
+            cls._stats[key] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """Get speculation counters and the hit rate over finished speculations"""
+        with cls._lock:
+            stats = dict(cls._stats)
+        hits = stats["exact_hits"] + stats["similar_hits"]
+        finished = hits + stats["misses"] + stats["unused"]
+        stats["hit_rate"] = hits / finished if finished else 0.0
+        return stats
+
+    async def _similarity(self, query: str) -> float:
+        """Cosine similarity of the two queries (embeddings are L2-normalized and cached)"""
+        service = ProductSearchService()
+        ours: List[float] = await SearchExecutors.run('embedding', service._get_text_embedding, self.query)
+        theirs: List[float] = await SearchExecutors.run('embedding', service._get_text_embedding, query)
+        return sum(a * b for a, b in zip(ours, theirs))
+
+    async def result_for(self, query: str) -> Optional[Dict[str, Any]]:
+        """Get the speculative result if query matches, else None"""
+        if self.used:
+            return None
+        self.used = True
+
+        if normalize_query(query) == normalize_query(self.query):
+            hit = "exact_hits"
+        elif await self._similarity(query) >= self.similarity_threshold:
+            hit = "similar_hits"
+        else:
+            self._record("misses")
+            self.task.cancel()
+            return None
+
+        try:
+            result = await self.task
+        except Exception as e:
+            logger.warning(f"Speculative search failed, searching again: {str(e)}")
+            self._record("misses")
+            return None
+
+        self._record(hit)
+        logger.debug(f"Serving product_search({query!r}) from speculative search ({hit})")
+        return result
+
+    def finish(self):
+        """Cancel the speculative search if the agent never asked for it"""
+        if not self.used:
+            self._record("unused")
+        if not self.task.done():
+            self.task.cancel()
+
+
+register_collector("speculative_search", SpeculativeSearch.stats)
@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable, Dict
+from uuid import UUID
+from datetime import datetime
+from langchain.callbacks.base import AsyncCallbackHandler
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WebSocketStreamingHandler(AsyncCallbackHandler):
+    """Forwards LLM token deltas, tool events and tool results to the WebSocket as they happen.
+
+    Frames are sent alongside the existing protocol; the final ``message``
+    envelope is still sent by the consumer once the agent run completes.
+    """
+
+    def __init__(
+        self,
+        send_json: Callable[[Dict[str, Any]], Awaitable[None]],
+        stream_tokens: bool = True,
+        send_tool_results: bool = True
+    ):
+        self.send_json = send_json
+        self.stream_tokens = stream_tokens
+        self.send_tool_results = send_tool_results
+        self._tool_names: Dict[UUID, str] = {}
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        # Function-call chunks carry no content, only arguments
+        if not self.stream_tokens or not token:
+            return
+        await self.send_json({
+            "type": "delta",
+            "role": "assistant",
+            "delta": token,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        tool_name = (serialized or {}).get("name", "unknown")
+        self._tool_names[run_id] = tool_name
+        if not self.stream_tokens:
+            return
+        await self.send_json({
+            "type": "tool_start",
+            "tool": tool_name,
+            "input": input_str,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        tool_name = self._tool_names.pop(run_id, kwargs.get("name", "unknown"))
+
+        # Deliver results now so the client can render them before the LLM summary
+        if self.send_tool_results:
+            await self.send_json({
+                "type": "tool_result",
+                "tool": tool_name,
+                "result": output if isinstance(output, str) else str(output),
+                "timestamp": datetime.now().isoformat()
+            })
+
+        if self.stream_tokens:
+            await self.send_json({
+                "type": "tool_end",
+                "tool": tool_name,
+                "timestamp": datetime.now().isoformat()
+            })
@@ -60,3 +60,11 @@ class MockAgent:
             summary += f"• {product['name']} (${product['price']:.2f}): {product['description']}\n"
 
         return summary
+
+    async def ainvoke(self, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Simulate AgentExecutor.ainvoke so the consumer can use the mock agent"""
+        output = await self.arun(inputs["input"], inputs.get("chat_history"))
+        return {
+            "output": output,
+            "intermediate_steps": self.intermediate_steps
+        }
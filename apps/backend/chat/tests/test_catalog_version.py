@@ -0,0 +1,57 @@
+import pytest
+from django.db.models.signals import post_delete, post_migrate, post_save
+import products
+from products.apps import ProductsConfig
+from products.cache import CatalogVersion
+from products.models import Product
+from products.services import ProductSearchService
+from products.signals import bump_catalog_version, install_search_vector_trigger
+
+
+@pytest.fixture
+def product_signals():
+    """Connect the catalog signals as ProductsConfig.ready does (products is not installed in tests)"""
+    config = ProductsConfig("products", products)
+    config.ready()
+    yield
+    post_save.disconnect(bump_catalog_version, sender=Product)
+    post_delete.disconnect(bump_catalog_version, sender=Product)
+    post_migrate.disconnect(install_search_vector_trigger, sender=config)
+
+
+@pytest.fixture
+def result_cache(settings):
+    settings.PRODUCT_SEARCH_RESULT_CACHE = True
+    cache = ProductSearchService.result_cache()
+    yield cache
+    cache.clear()
+
+
+def test_product_save_and_delete_bump_the_catalog_version(product_signals):
+    """Test that every product write invalidates catalog-derived caches"""
+    product = Product(name="Standing Desk", description="Adjustable", category="Furniture", price=399)
+    version = CatalogVersion.get()
+
+    post_save.send(sender=Product, instance=product, created=True)
+    assert CatalogVersion.get() == version + 1
+
+    post_delete.send(sender=Product, instance=product)
+    assert CatalogVersion.get() == version + 2
+
+
+def test_catalog_change_makes_cached_results_unreachable(product_signals, result_cache):
+    """Test that a search cached before a product change is not served after it"""
+    service = ProductSearchService()
+    options = {"limit": 10, "category": "Furniture"}
+    key, cached = service._cached_result("standing desks", options)
+    assert cached is None
+
+    result_cache.set(key, {"data": [], "metadata": {}})
+    assert service._cached_result("Standing  desks", options) == (key, {"data": [], "metadata": {}})
+
+    product = Product(name="Standing Desk", description="Adjustable", category="Furniture", price=399)
+    post_save.send(sender=Product, instance=product, created=False)
+
+    new_key, cached = service._cached_result("standing desks", options)
+    assert new_key != key
+    assert cached is None
@@ -3,8 +3,9 @@ from channels.testing import WebsocketCommunicator
 from django.test import TestCase
 from channels.routing import URLRouter
 from django.urls import re_path
-from ..consumers import ChatConsumer
+from ..consumers import CANCELLED_WORK, ChatConsumer
 from ..models import ChatSession, Message, ChatResponse
+from ..providers import ChatAgentProvider
 import pytest
 from unittest.mock import patch, AsyncMock
 from .test_base import AsyncChatTestCase
@@ -257,3 +258,119 @@ class ChatConsumerTests(AsyncChatTestCase):
         self.assertEqual(messages.count(), 10)  # 5 user messages + 5 AI responses
 
         await communicator.disconnect()
+
+
+def test_coalesce_merges_consecutive_messages():
+    """Test that a run of queued user messages becomes one turn"""
+    batch = [{"message": "Hi"}, {"message": "I need a desk"}, {"message": "under $200"}]
+
+    assert ChatConsumer.coalesce(batch) == [{"message": "Hi\nI need a desk\nunder $200"}]
+
+
+def test_coalesce_keeps_system_prompts_separate_and_in_order():
+    """Test that system prompts are never merged and stay between the messages they separate"""
+    batch = [
+        {"message": "[SYSTEM PROMPT] Be brief"},
+        {"message": "Hi"},
+        {"message": "Any desks?"},
+        {"message": "[SYSTEM PROMPT] Be detailed"},
+        {"message": "[SYSTEM PROMPT] Be formal"},
+        {"message": "And chairs?"},
+    ]
+
+    assert [group["message"] for group in ChatConsumer.coalesce(batch)] == [
+        "[SYSTEM PROMPT] Be brief",
+        "Hi\nAny desks?",
+        "[SYSTEM PROMPT] Be detailed",
+        "[SYSTEM PROMPT] Be formal",
+        "And chairs?",
+    ]
+
+
+class SlowAgent:
+    """Agent whose turn runs until it is cancelled"""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def ainvoke(self, inputs, config=None):
+        self.started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_the_running_turn():
+    """Test that a client leaving mid-turn cancels the agent without sending an "interrupted" frame"""
+    agent = SlowAgent()
+    ChatAgentProvider.set_agent(agent)
+    try:
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/?session_id={uuid.uuid4()}")
+        connected, _ = await communicator.connect()
+        assert connected
+
+        await communicator.send_json_to({"message": "Show me standing desks"})
+        assert (await communicator.receive_json_from())["role"] == "user"
+        await asyncio.wait_for(agent.started.wait(), timeout=5)
+
+        cancelled_turns = CANCELLED_WORK.value(kind="turn")
+        await communicator.disconnect()
+
+        assert agent.cancelled
+        assert CANCELLED_WORK.value(kind="turn") == cancelled_turns + 1
+        assert await communicator.receive_nothing()
+    finally:
+        ChatAgentProvider.set_agent(None)
+
+
+class FailingAgent:
+    """Agent that must not be reached"""
+
+    async def ainvoke(self, inputs, config=None):
+        raise AssertionError("the agent should not run")
+
+
+@pytest.mark.asyncio
+async def test_follow_up_to_cached_answer_is_refined(monkeypatch, settings):
+    """Test that a response-cache hit keeps its candidates so follow-ups are refined without the agent"""
+    from ..response_cache import ResponseCache
+
+    settings.CHAT_RESPONSE_CACHE = True
+    settings.CHAT_REFINE_RESULTS = True
+    settings.CHAT_LOG_ENABLED = False
+    results = {
+        "data": [
+            {"id": str(i), "name": f"Desk {i}", "category": "Furniture", "price": 100.0 * i} for i in range(1, 5)
+        ],
+        "metadata": {"search_type": "hybrid", "total_results": 4}
+    }
+    cached = {
+        "output": "Here are some standing desks",
+        "tool_results": [{"tool": "product_search", "result": json.dumps(results)}],
+        "last_search": {"query": "standing desks", "results": results, "page_size": 10}
+    }
+    monkeypatch.setattr(ResponseCache.instance(), "lookup", AsyncMock(return_value=cached))
+    ChatAgentProvider.set_agent(FailingAgent())
+    try:
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/?session_id={uuid.uuid4()}")
+        await communicator.connect()
+
+        await communicator.send_json_to({"message": "Show me standing desks"})
+        await communicator.receive_json_from()
+        answer = await communicator.receive_json_from()
+        assert answer["metadata"]["cached"]
+
+        await communicator.send_json_to({"message": "only the cheaper ones"})
+        await communicator.receive_json_from()
+        refined = await communicator.receive_json_from()
+        assert refined["metadata"]["refined"]
+        prices = [product["price"] for product in json.loads(refined["metadata"]["tool_results"][0]["result"])["data"]]
+        assert prices == [100.0, 200.0]
+
+        await communicator.disconnect()
+    finally:
+        ChatAgentProvider.set_agent(None)
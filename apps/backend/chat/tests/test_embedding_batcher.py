@@ -0,0 +1,60 @@
+import threading
+import pytest
+from products.services import EmbeddingBatcher
+
+
+def test_concurrent_submits_resolve_in_one_batch_in_order():
+    """Test that requests queued within max_wait share one forward pass and keep their order"""
+    batches = []
+
+    def embed_batch(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, max_batch=16, max_wait=0.2)
+    futures = [batcher.submit(text) for text in ["a", "bb", "ccc"]]
+
+    assert [future.result(timeout=2) for future in futures] == [[1.0], [2.0], [3.0]]
+    assert batches == [["a", "bb", "ccc"]]
+    assert batcher.stats()["largest_batch"] == 3
+
+
+def test_batches_are_capped_at_max_batch():
+    """Test that a burst larger than max_batch is split across forward passes"""
+    sizes = []
+
+    def embed_batch(texts):
+        sizes.append(len(texts))
+        return [[0.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, max_batch=2, max_wait=0.2)
+    futures = [batcher.submit(str(i)) for i in range(5)]
+    for future in futures:
+        future.result(timeout=2)
+
+    assert sum(sizes) == 5
+    assert max(sizes) == 2
+
+
+def test_failing_batch_reaches_every_caller():
+    """Test that an embedding error is raised to every caller in the batch and the worker survives"""
+    calls = []
+
+    def embed_batch(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise ValueError("model failed")
+        return [[1.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, max_batch=16, max_wait=0.2)
+    futures = [batcher.submit(text) for text in ["a", "b"]]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
+
+    # The worker keeps serving later requests
+    results = []
+    thread = threading.Thread(target=lambda: results.append(batcher.embed("c")))
+    thread.start()
+    thread.join(timeout=2)
+    assert results == [[1.0]]
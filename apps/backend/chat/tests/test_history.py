@@ -0,0 +1,63 @@
+import pytest
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from ..history import InMemoryHistoryStore, deserialize_history, serialize_history
+
+
+def test_serialization_round_trip():
+    """Test that history survives compact serialization"""
+    messages = [
+        SystemMessage(content="You are a product assistant"),
+        HumanMessage(content="Show me office chairs"),
+        AIMessage(content="Here are some chairs"),
+    ]
+    data = serialize_history(messages)
+
+    assert data.startswith('[["s",')
+    restored = deserialize_history(data)
+    assert [type(message) for message in restored] == [SystemMessage, HumanMessage, AIMessage]
+    assert [message.content for message in restored] == [message.content for message in messages]
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_is_bounded_and_keeps_system_prompt():
+    """Test that saved history is trimmed to max_messages without losing the system prompt"""
+    store = InMemoryHistoryStore(max_messages=3)
+    messages = [SystemMessage(content="system")] + [
+        HumanMessage(content=f"message {i}") for i in range(5)
+    ]
+    await store.save("session-1", messages)
+
+    loaded = await store.load("session-1")
+    assert [message.content for message in loaded] == ["system", "message 3", "message 4"]
+    assert await store.load("unknown-session") == []
+
+    await store.clear("session-1")
+    assert await store.load("session-1") == []
+
+
+def test_trim_history_keeps_system_prompt_and_newest_turns():
+    """Test that token-budget trimming evicts the oldest turns first"""
+    from ..compaction import history_tokens, trim_history
+
+    messages = [SystemMessage(content="system")] + [
+        HumanMessage(content=f"message {i} " + "word " * 50) for i in range(10)
+    ]
+    budget = history_tokens(messages[:1] + messages[-3:])
+
+    kept, evicted = trim_history(messages, budget)
+
+    assert kept == messages[:1] + messages[-3:]
+    assert evicted == messages[1:-3]
+
+
+def test_summary_is_kept_apart_from_the_system_prompt():
+    """Test that the running summary is never mistaken for the system prompt"""
+    from ..compaction import is_summary, with_summary
+
+    history = with_summary([HumanMessage(content="hi")], "User wants a desk")
+    assert is_summary(history[0])
+
+    history = with_summary([SystemMessage(content="system")] + history, "User wants a standing desk")
+    assert [message.content for message in history[:1]] == ["system"]
+    assert is_summary(history[1]) and "standing desk" in history[1].content
+    assert sum(1 for message in history if is_summary(message)) == 1
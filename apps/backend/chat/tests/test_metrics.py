@@ -0,0 +1,48 @@
+from config.metrics import Counter, Histogram, collect_timings, render_prometheus, span
+
+
+def test_span_records_into_request_timings():
+    """Test that spans inside collect_timings are summed per stage"""
+    with collect_timings() as timings:
+        with span("embedding"):
+            pass
+        with span("embedding"):
+            pass
+        with span("search_query"):
+            pass
+
+    assert set(timings) == {"embedding", "search_query"}
+    assert all(value >= 0 for value in timings.values())
+
+
+def test_span_outside_request_only_updates_histogram():
+    """Test that spans without a collector do not fail"""
+    with span("json_encode"):
+        pass
+    assert 'stage="json_encode"' in render_prometheus()
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test Prometheus bucket semantics"""
+    histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    output = histogram.render()
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in output
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in output
+    assert "test_latency_seconds_count 3" in output
+
+
+def test_counter_labels():
+    """Test labelled counters"""
+    counter = Counter("test_events_total", "Test events", labelnames=("kind",))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    counter.inc(kind="b")
+
+    assert counter.value(kind="a") == 3
+    assert counter.value(kind="b") == 1
+    assert 'test_events_total{kind="a"} 3' in counter.render()
@@ -0,0 +1,95 @@
+import time
+import pytest
+from .. import persistence
+from ..persistence import ChatLogBuffer, MAX_CONTENT_LENGTH, MAX_SESSION_ID_LENGTH
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Capture what each flush would write instead of touching the database"""
+    batches = []
+    monkeypatch.setattr(persistence, "close_old_connections", lambda: None)
+    monkeypatch.setattr(
+        ChatLogBuffer, "_write",
+        lambda self, messages, tool_executions: batches.append((messages, tool_executions))
+    )
+    return batches
+
+
+def test_flush_writes_queued_records_in_one_batch(written):
+    """Test that queued messages and tool executions are handed to a single write"""
+    buffer = ChatLogBuffer(max_size=100, flush_interval=60)
+    message_id = buffer.add_message("session", "assistant", "x" * (MAX_CONTENT_LENGTH + 5))
+    buffer.add_tool_execution(message_id, "product_search", {"query": "desk"}, [], 12.5)
+
+    assert buffer.pending() == 2
+    assert buffer.flush() == 2
+    assert buffer.pending() == 0
+    assert buffer.flush() == 0
+
+    [(messages, tool_executions)] = written
+    assert messages[0]["id"] == message_id
+    assert len(messages[0]["content"]) == MAX_CONTENT_LENGTH
+    assert tool_executions[0]["message_id"] == message_id
+    assert buffer.stats()["messages_written"] == 1
+
+
+def test_failed_flush_drops_the_batch(monkeypatch):
+    """Test that a write error is counted and the records are not retried"""
+    monkeypatch.setattr(persistence, "close_old_connections", lambda: None)
+
+    def fail(self, messages, tool_executions):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(ChatLogBuffer, "_write", fail)
+    buffer = ChatLogBuffer(max_size=100, flush_interval=60)
+    buffer.add_message("session", "user", "Hi")
+
+    assert buffer.flush() == 0
+    assert buffer.stats() == {
+        "messages_written": 0, "tool_executions_written": 0, "flushes": 0, "flush_errors": 1, "pending": 0
+    }
+
+
+def test_bad_session_does_not_drop_other_sessions(monkeypatch):
+    """Test that a failed batch is retried per session so only the bad session's records are lost"""
+    monkeypatch.setattr(persistence, "close_old_connections", lambda: None)
+    written = []
+
+    def write(self, messages, tool_executions):
+        if any(message["session_id"] == "bad" for message in messages):
+            raise RuntimeError("value too long")
+        written.append((messages, tool_executions))
+
+    monkeypatch.setattr(ChatLogBuffer, "_write", write)
+    buffer = ChatLogBuffer(max_size=100, flush_interval=60)
+    good_id = buffer.add_message("good", "assistant", "Hello")
+    buffer.add_tool_execution(good_id, "product_search", {"query": "desk"}, [], 12.5)
+    buffer.add_message("bad", "user", "Hi")
+
+    assert buffer.flush() == 2
+    [(messages, tool_executions)] = written
+    assert [message["id"] for message in messages] == [good_id]
+    assert tool_executions[0]["message_id"] == good_id
+    assert buffer.stats()["flush_errors"] == 1
+
+
+def test_long_session_ids_are_truncated(written):
+    """Test that session ids are cut to the column length when queued"""
+    buffer = ChatLogBuffer(max_size=100, flush_interval=60)
+    buffer.add_message("s" * (MAX_SESSION_ID_LENGTH + 50), "user", "Hi")
+    buffer.flush()
+
+    assert len(written[0][0][0]["session_id"]) == MAX_SESSION_ID_LENGTH
+
+
+def test_full_buffer_wakes_the_flush_thread(written):
+    """Test that reaching max_size flushes without waiting for the interval"""
+    buffer = ChatLogBuffer(max_size=2, flush_interval=60)
+    buffer.add_message("session", "user", "Hi")
+    buffer.add_message("session", "assistant", "Hello")
+
+    deadline = time.monotonic() + 2
+    while buffer.stats()["messages_written"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert buffer.stats()["messages_written"] == 2
@@ -0,0 +1,37 @@
+from ..tool_selections.refinement import ResultSet, parse_refinement
+
+CATEGORIES = ["Electronics", "Furniture"]
+
+
+def make_results(count=24):
+    return {
+        "data": [
+            {"id": i, "name": f"Product {i}", "category": "Furniture" if i % 2 else "Electronics", "price": 10.0 * i}
+            for i in range(1, count + 1)
+        ],
+        "metadata": {"search_type": "hybrid", "total_results": count}
+    }
+
+
+def test_parse_refinement_accepts_only_refinements():
+    """Test that follow-ups are recognized and new requests are not"""
+    assert parse_refinement("only the cheaper ones", CATEGORIES) == {"relative": "cheaper"}
+    assert parse_refinement("show me the electronics", CATEGORIES) == {"category": "Electronics"}
+    assert parse_refinement("under $100", CATEGORIES) == {"max_price": 100.0}
+    assert parse_refinement("show me more", CATEGORIES) == {"page": "next"}
+    assert parse_refinement("chairs under $100", CATEGORIES) is None
+    assert parse_refinement("do you have lamps?", CATEGORIES) is None
+
+
+def test_result_set_filters_sorts_and_pages():
+    """Test that refinements narrow the candidates and fall back when nothing is left"""
+    result_set = ResultSet("desks", make_results(), page_size=5)
+
+    page = result_set.refine({"category": "Electronics", "sort": "price_desc"})
+    assert [product["id"] for product in page["data"]] == [24, 22, 20, 18, 16]
+    assert page["metadata"]["matching_results"] == 12
+
+    page = result_set.refine({"page": "next"})
+    assert [product["id"] for product in page["data"]] == [14, 12, 10, 8, 6]
+
+    assert result_set.refine({"max_price": 5.0}) is None
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from products.cache import CatalogVersion
+from .. import response_cache
+from ..response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    vectors = {
+        "do you have standing desks?": [1.0, 0.0],
+        "do you have standing desks": [0.99, 0.141],
+        "show me office chairs": [0.0, 1.0],
+        "standing desks under $200": [0.6, 0.8],
+        "standing desks under $500": [0.6, 0.8],
+    }
+    monkeypatch.setattr(response_cache, "known_categories", lambda: ["Furniture"])
+    monkeypatch.setattr(ResponseCache, "_embed", staticmethod(lambda question: np.asarray(vectors[question])))
+    return ResponseCache(similarity_threshold=0.95)
+
+
+def test_similar_question_is_served_from_cache(cache):
+    """Test that near-duplicate questions share an answer but unrelated ones do not"""
+    response = {"output": "Yes, we have standing desks", "tool_results": []}
+    cache._store("prompt", "Do you have standing desks?", response)
+
+    assert cache._lookup("prompt", "do you have  standing desks?") == response
+    assert cache._lookup("prompt", "Do you have standing desks") == response
+    assert cache._lookup("prompt", "Show me office chairs") is None
+    assert cache._lookup("other prompt", "Do you have standing desks?") is None
+
+
+def test_catalog_change_invalidates_answers(cache):
+    """Test that bumping the catalog version hides older answers"""
+    cache._store("prompt", "Do you have standing desks?", {"output": "Yes", "tool_results": []})
+    CatalogVersion.bump()
+
+    assert cache._lookup("prompt", "Do you have standing desks?") is None
+
+
+def test_questions_with_different_constraints_do_not_share_answers(cache):
+    """Test that similar wording with another price bound is not served the cached answer"""
+    cache._store("prompt", "Standing desks under $200", {"output": "Under $200", "tool_results": []})
+
+    assert cache._lookup("prompt", "Standing desks under $500") is None
+    assert cache._lookup("prompt", "standing desks under $200")["output"] == "Under $200"
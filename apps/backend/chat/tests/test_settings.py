@@ -31,6 +31,12 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Never load embedding models during tests
+EMBEDDING_MODEL_WARMUP = False
+
+# Test databases roll back without catalog signals, so cached results could leak between tests
+PRODUCT_SEARCH_RESULT_CACHE = False
+
 # Disable password hashing to speed up tests
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
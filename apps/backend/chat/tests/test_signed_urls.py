@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+import pytest
+from django.utils import timezone
+from products.models import Product
+from products.signed_urls import SignedUrlService
+
+
+def product(name: str, signed_url: str = None, expires_in: timedelta = None) -> Product:
+    return Product(
+        name=name,
+        description="",
+        category="Furniture",
+        price=100,
+        image_key=f"products/{name}.jpg",
+        signed_url=signed_url,
+        signed_url_expires_at=timezone.now() + expires_in if expires_in is not None else None
+    )
+
+
+@pytest.fixture
+def client(monkeypatch, settings):
+    settings.MINIO_SIGNED_URL_REFRESH_MARGIN_MINUTES = 60
+    client = MagicMock()
+    client.presigned_get_object.side_effect = lambda bucket, key, expires: f"https://minio/{key}?signed"
+    monkeypatch.setattr(SignedUrlService, "_client", client)
+    return client
+
+
+@pytest.fixture
+def bulk_update(monkeypatch):
+    bulk_update = MagicMock()
+    monkeypatch.setattr(Product.objects, "bulk_update", bulk_update)
+    return bulk_update
+
+
+def test_needs_refresh(client):
+    """Test that missing URLs and URLs expiring within the margin are refreshed, valid ones are not"""
+    assert SignedUrlService.needs_refresh(product("missing"))
+    assert SignedUrlService.needs_refresh(product("no-expiry", signed_url="https://minio/old"))
+    assert SignedUrlService.needs_refresh(product("expired", "https://minio/old", timedelta(minutes=-5)))
+    assert SignedUrlService.needs_refresh(product("expiring", "https://minio/old", timedelta(minutes=30)))
+    assert not SignedUrlService.needs_refresh(product("valid", "https://minio/old", timedelta(hours=6)))
+
+
+def test_refresh_updates_only_stale_rows_in_one_query(client, bulk_update):
+    """Test that only stale URLs are regenerated and they are saved with a single bulk_update"""
+    valid = product("valid", "https://minio/valid", timedelta(hours=6))
+    stale = [product("missing"), product("expiring", "https://minio/old", timedelta(minutes=30))]
+
+    refreshed = SignedUrlService.refresh([valid, *stale])
+
+    assert refreshed == stale
+    assert [p.signed_url for p in stale] == [
+        "https://minio/products/missing.jpg?signed", "https://minio/products/expiring.jpg?signed"
+    ]
+    assert all(p.signed_url_expires_at > timezone.now() + timedelta(hours=1) for p in stale)
+    assert valid.signed_url == "https://minio/valid"
+    bulk_update.assert_called_once_with(stale, ['signed_url', 'signed_url_expires_at'])
+
+
+def test_refresh_skips_the_query_when_everything_is_valid(client, bulk_update):
+    """Test that valid URLs are reused without signing or writing"""
+    assert SignedUrlService.refresh([product("valid", "https://minio/valid", timedelta(hours=6))]) == []
+    client.presigned_get_object.assert_not_called()
+    bulk_update.assert_not_called()
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+import pytest
+from products.cache import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    """Test that identical calls from several threads run once"""
+    flight = SingleFlight("test")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    """Test that a shared coroutine survives while any caller still waits on it"""
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    first = asyncio.ensure_future(flight.ado("key", compute))
+    second = asyncio.ensure_future(flight.ado("key", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "result"
+    assert flight.stats() == {"calls": 2, "coalesced": 1, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_caller_after_abandoned_call_starts_afresh():
+    """Test that joining right after every caller cancelled does not inherit the cancellation"""
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    first = asyncio.ensure_future(flight.ado("key", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+
+    assert await flight.ado("key", compute) == "result"
+    assert flight.stats()["coalesced"] == 0
@@ -0,0 +1,88 @@
+import asyncio
+import gc
+import pytest
+from ..speculation import SpeculativeSearch
+
+
+def speculation(monkeypatch, similarity: float = 0.0, delay: float = 0.0, error: Exception = None):
+    """Start a speculative search whose similarity to any other query is fixed"""
+    async def search(query):
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return {"query": query, "results": []}
+
+    async def fixed_similarity(self, query):
+        return similarity
+
+    monkeypatch.setattr(SpeculativeSearch, "_similarity", fixed_similarity)
+    return SpeculativeSearch("Standing desks", search)
+
+
+def counts(*keys):
+    stats = SpeculativeSearch.stats()
+    return [stats[key] for key in keys]
+
+
+@pytest.mark.asyncio
+async def test_exact_query_is_served_once(monkeypatch):
+    """Test that the same query (up to case and spacing) gets the speculative result, but only once"""
+    before = counts("exact_hits")
+    speculative = speculation(monkeypatch)
+
+    assert await speculative.result_for("standing  desks") == {"query": "Standing desks", "results": []}
+    assert await speculative.result_for("standing desks") is None
+    assert counts("exact_hits")[0] == before[0] + 1
+
+
+@pytest.mark.asyncio
+async def test_similar_query_is_served(monkeypatch):
+    """Test that a reworded query above the threshold gets the speculative result"""
+    before = counts("similar_hits")
+    speculative = speculation(monkeypatch, similarity=0.95)
+
+    assert await speculative.result_for("desks you can stand at") is not None
+    assert counts("similar_hits")[0] == before[0] + 1
+
+
+@pytest.mark.asyncio
+async def test_different_query_cancels_the_search(monkeypatch):
+    """Test that a query below the threshold is a miss and stops the speculative search"""
+    before = counts("misses")
+    speculative = speculation(monkeypatch, similarity=0.5, delay=10)
+
+    assert await speculative.result_for("office chairs") is None
+    await asyncio.sleep(0)
+    assert speculative.task.cancelled()
+    assert counts("misses")[0] == before[0] + 1
+
+
+@pytest.mark.asyncio
+async def test_unused_search_is_cancelled_when_the_turn_ends(monkeypatch):
+    """Test that finish cancels a speculative search the agent never asked for"""
+    before = counts("unused")
+    speculative = speculation(monkeypatch, delay=10)
+
+    speculative.finish()
+    await asyncio.sleep(0)
+    assert speculative.task.cancelled()
+    assert counts("unused")[0] == before[0] + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_unused_search_is_not_reported_as_unretrieved(monkeypatch):
+    """Test that the error of a failed speculation that nobody awaited is consumed"""
+    loop = asyncio.get_running_loop()
+    errors = []
+    previous_handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    try:
+        speculative = speculation(monkeypatch, error=RuntimeError("search failed"))
+        await asyncio.sleep(0.01)
+        speculative.finish()
+        del speculative
+        gc.collect()
+    finally:
+        loop.set_exception_handler(previous_handler)
+
+    assert errors == []
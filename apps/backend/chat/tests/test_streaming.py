@@ -0,0 +1,80 @@
+import uuid
+import pytest
+from ..streaming import WebSocketStreamingHandler
+
+
+def handler(**options):
+    frames = []
+
+    async def send_json(frame):
+        frames.append(frame)
+
+    return WebSocketStreamingHandler(send_json, **options), frames
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_streamed_and_empty_tokens_skipped():
+    """Test that content tokens become delta frames and function-call chunks are not sent"""
+    streaming, frames = handler(send_tool_results=False)
+
+    for token in ["Here", "", " are", ""]:
+        await streaming.on_llm_new_token(token)
+
+    assert [frame["delta"] for frame in frames] == ["Here", " are"]
+    assert all(frame["type"] == "delta" for frame in frames)
+
+
+@pytest.mark.asyncio
+async def test_tool_events_bracket_the_tool_run():
+    """Test that tool_start and tool_end carry the tool name from the start event"""
+    streaming, frames = handler(send_tool_results=False)
+    run_id = uuid.uuid4()
+
+    await streaming.on_tool_start({"name": "product_search"}, "standing desks", run_id=run_id)
+    await streaming.on_tool_end('{"data": []}', run_id=run_id)
+
+    assert [(frame["type"], frame["tool"]) for frame in frames] == [
+        ("tool_start", "product_search"), ("tool_end", "product_search")
+    ]
+    assert frames[0]["input"] == "standing desks"
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_sent_when_streaming_is_off():
+    """Test that a handler with every frame type disabled stays silent"""
+    streaming, frames = handler(stream_tokens=False, send_tool_results=False)
+    run_id = uuid.uuid4()
+
+    await streaming.on_llm_new_token("Here")
+    await streaming.on_tool_start({"name": "product_search"}, "desks", run_id=run_id)
+    await streaming.on_tool_end("[]", run_id=run_id)
+
+    assert frames == []
+
+
+@pytest.mark.asyncio
+async def test_tool_result_is_sent_between_tool_start_and_tool_end():
+    """Test that results reach the client as soon as the tool returns, before tool_end"""
+    streaming, frames = handler()
+    run_id = uuid.uuid4()
+
+    await streaming.on_tool_start({"name": "product_search"}, "standing desks", run_id=run_id)
+    await streaming.on_tool_end('{"data": []}', run_id=run_id)
+
+    assert [frame["type"] for frame in frames] == ["tool_start", "tool_result", "tool_end"]
+    assert frames[1]["tool"] == "product_search"
+    assert frames[1]["result"] == '{"data": []}'
+
+
+@pytest.mark.asyncio
+async def test_tool_results_are_sent_without_token_streaming():
+    """Test that send_tool_results works on its own when token streaming is off"""
+    streaming, frames = handler(stream_tokens=False)
+    run_id = uuid.uuid4()
+
+    await streaming.on_llm_new_token("Here")
+    await streaming.on_tool_start({"name": "product_search"}, "desks", run_id=run_id)
+    await streaming.on_tool_end(["not", "a", "string"], run_id=run_id)
+
+    assert [(frame["type"], frame["tool"]) for frame in frames] == [("tool_result", "product_search")]
+    assert frames[0]["result"] == "['not', 'a', 'string']"
@@ -88,3 +88,74 @@ async def test_system_prompt_handling():
     assert response.tool_results[0].tool_name == "product_search"
     assert "Let me search" not in response.message
     assert "I'll look" not in response.message
+
+
+def test_search_filters_are_parsed_from_the_query():
+    """Test that price ranges and known categories become search filters"""
+    from ..tool_selections.filters import parse_search_filters, resolve_search_filters
+
+    categories = ["Electronics", "Furniture"]
+
+    assert parse_search_filters("chairs under $200", categories) == {
+        "query": "chairs", "category": None, "min_price": None, "max_price": 200.0
+    }
+    assert parse_search_filters("Show me office chairs between $150 and $400", categories)["min_price"] == 150.0
+    assert parse_search_filters("headphones $20-$40", categories)["max_price"] == 40.0
+    assert parse_search_filters("show me the electronics", categories)["category"] == "Electronics"
+    assert parse_search_filters("2-3 seater sofa", categories)["min_price"] is None
+
+    # Numbers with units are not prices
+    assert parse_search_filters("backpack under 5 lbs", categories) == {
+        "query": "backpack under 5 lbs", "category": None, "min_price": None, "max_price": None
+    }
+    assert parse_search_filters("monitors over 27 inches", categories)["min_price"] is None
+    assert parse_search_filters("tables between 2 and 4 people", categories)["max_price"] is None
+    assert parse_search_filters("desks over 1,000 dollars", categories)["min_price"] == 1000.0
+    assert parse_search_filters("monitors under 27in", categories)["max_price"] is None
+    assert parse_search_filters("dumbbells under 5kg", categories)["max_price"] is None
+
+    # A "$" always marks a price, and "k" means thousands
+    assert parse_search_filters("desks under $300 in black", categories) == {
+        "query": "desks in black", "category": None, "min_price": None, "max_price": 300.0
+    }
+    assert parse_search_filters("chairs under $200 in furniture", categories)["max_price"] == 200.0
+    assert parse_search_filters("under $1.5k", categories) == {
+        "query": "under $1.5k", "category": None, "min_price": None, "max_price": 1500.0
+    }
+    assert parse_search_filters("laptops between $1k and $2k", categories)["max_price"] == 2000.0
+    assert parse_search_filters("desks under 50$", categories) == {
+        "query": "desks", "category": None, "min_price": None, "max_price": 50.0
+    }
+
+    # Arguments from the LLM win; unknown categories are dropped
+    assert resolve_search_filters("desks under $300", "furniture", max_price=250, categories=categories) == {
+        "query": "desks", "category": "Furniture", "min_price": None, "max_price": 250
+    }
+    assert resolve_search_filters("toys", "Toys", categories=categories)["category"] is None
+
+
+def test_search_results_are_json_serializable():
+    """Test that a Product row (UUID primary key) survives json.dumps in the tool output"""
+    import json
+    import uuid
+    from decimal import Decimal
+    from products.models import Product
+    from products.services import ProductSearchService
+
+    product = Product(
+        name="Standing Desk",
+        description="Adjustable height desk",
+        category="Furniture",
+        price=Decimal("499.99"),
+        signed_url="https://example.com/desk.jpg",
+        image_key="desk.jpg"
+    )
+    product.hybrid_score = 0.5
+    assert isinstance(product.id, uuid.UUID)
+
+    result = ProductSearchService._serialize_product(product)
+    decoded = json.loads(json.dumps({"data": [result]}))
+
+    assert decoded["data"][0]["id"] == str(product.id)
+    assert decoded["data"][0]["price"] == 499.99
+    assert decoded["data"][0]["scores"]["hybrid"] == 0.5
@@ -1,4 +1,14 @@
 # Tool selections package
-from .product_search import create_product_search_agent
+from django.conf import settings
+from .product_search import create_product_search_agent, search_products
+from .retrieval import create_retrieval_agent
 
-__all__ = ['create_product_search_agent']
+
+def create_chat_agent(api_key: str):
+    """Create the agent pipeline selected by CHAT_AGENT_MODE ('agent' or 'retrieval')"""
+    if getattr(settings, 'CHAT_AGENT_MODE', 'agent') == 'retrieval':
+        return create_retrieval_agent(api_key)
+    return create_product_search_agent(api_key)
+
+
+__all__ = ['create_chat_agent', 'create_product_search_agent', 'create_retrieval_agent', 'search_products']
@@ -0,0 +1,124 @@
+from typing import Any, Dict, Iterable, List, Optional
+from products.cache import CatalogVersion, LRUCache
+from products.models import Product
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# The lookahead stops a partial match such as "2" out of "27"
+_NUMBER = r"\d+(?:,\d{3})*(?:\.\d+)?(?![.,]?\d)"
+# Numbers followed by a unit are sizes, weights, etc. ("under 5 lbs", "over 27 inches"), not prices
+_NOT_UNIT = (
+    r"(?!\s*(?:[%\"']|(?:lbs?|pounds?|kgs?|kilograms?|grams?|g|oz|ounces?|inch(?:es)?|in|cm|mm|m|"
+    r"meters?|metres?|ft|feet|foot|w|watts?|v|volts?|gb|tb|mb|hz|mah|l|liters?|litres?|years?|yrs?|"
+    r"months?|days?|hours?|hrs?|minutes?|mins?|people|persons?|seats?|seater|pieces?|pcs|x)\b))"
+)
+
+
+def _amount_pattern(name: str) -> str:
+    """Pattern for one price, captured in the groups name (the number) and name_k ("k" for thousands)
+
+    A number glued to any other letter ("5kg", "27in") is not a price, and the
+    unit check is skipped once a "$" marks the amount ("under $300 in black").
+    """
+    return (
+        rf"(?P<{name}_dollar>\$\s*)?(?P<{name}>{_NUMBER})(?P<{name}_k>\s?k\b)?(?![a-z])"
+        rf"(?({name}_dollar)|{_NOT_UNIT})(?:\s*(?:\$|dollars|usd|bucks))?"
+    )
+
+
+# Ranges are tried before single bounds.
+# Bare "2-3" is not a price ("2-3 seater sofa"), so dash ranges need a "$".
+_PRICE_PATTERNS = [
+    (re.compile(rf"\bbetween\s+{_amount_pattern('low')}\s+and\s+{_amount_pattern('high')}", re.I), "range"),
+    (re.compile(rf"\$\s*(?P<low>{_NUMBER})(?P<low_k>\s?k\b)?\s*(?:-|–|to)\s*{_amount_pattern('high')}", re.I), "range"),
+    (re.compile(rf"\b(?:under|below|less than|cheaper than|at most|no more than|up to)\s+{_amount_pattern('amount')}", re.I), "max"),
+    (re.compile(rf"\b(?:over|above|more than|at least|starting at)\s+{_amount_pattern('amount')}", re.I), "min"),
+]
+
+_categories = LRUCache(max_size=1, ttl=5 * 60)
+
+
+def _amount(match: re.Match, name: str) -> float:
+    amount = float(match.group(name).replace(",", ""))
+    return amount * 1000 if match.group(f"{name}_k") else amount
+
+
+def known_categories() -> List[str]:
+    """Get the distinct catalog categories (served by the category index, cached per catalog version)"""
+    key = str(CatalogVersion.get())
+    categories = _categories.get(key)
+    if categories is None:
+        categories = sorted(set(Product.objects.values_list("category", flat=True).distinct()))
+        _categories.set(key, categories)
+    return categories
+
+
+def match_category(text: str, categories: Iterable[str]) -> Optional[str]:
+    """Find a known category named in text, ignoring case and a plural 's'"""
+    for category in categories:
+        stem = re.escape(category.lower().rstrip("s"))
+        if re.search(rf"\b{stem}s?\b", text, re.I):
+            return category
+    return None
+
+
+def parse_search_filters(query: str, categories: Iterable[str] = ()) -> Dict[str, Any]:
+    """Extract price bounds and a known category from a free-text query
+
+    Price phrases ("under $200", "between 50 and 100", "$20-$40") become
+    min_price/max_price and are removed from the returned query so they do
+    not skew the embedding. Category names are matched but left in the query.
+    """
+    filters: Dict[str, Any] = {"query": query, "category": None, "min_price": None, "max_price": None}
+
+    text = query
+    for pattern, kind in _PRICE_PATTERNS:
+        match = pattern.search(text)
+        if match is None:
+            continue
+        if kind == "range":
+            low, high = sorted((_amount(match, "low"), _amount(match, "high")))
+            filters["min_price"], filters["max_price"] = low, high
+        elif kind == "max" and filters["max_price"] is None:
+            filters["max_price"] = _amount(match, "amount")
+        elif kind == "min" and filters["min_price"] is None:
+            filters["min_price"] = _amount(match, "amount")
+        text = text[:match.start()] + text[match.end():]
+
+    remaining = " ".join(text.split()).strip(" ,.?!")
+    # Keep the original query when only punctuation or a stray letter is left
+    if re.search(r"[^\W\d_]{2,}", remaining):
+        filters["query"] = remaining
+    filters["category"] = match_category(query, categories)
+    return filters
+
+
+def resolve_search_filters(
+    query: str,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    categories: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """Combine filters passed by the LLM with those parsed from the query
+
+    Explicit arguments win. Categories are mapped onto the catalog's spelling,
+    and unknown ones are dropped rather than filtering everything out.
+    """
+    categories = list(categories)
+    parsed = parse_search_filters(query, categories)
+
+    if category:
+        known = {name.lower(): name for name in categories}
+        category = known.get(category.lower()) or match_category(category, categories)
+        if category is None:
+            logger.debug(f"Ignoring unknown category filter for query {query!r}")
+
+    return {
+        "query": parsed["query"],
+        "category": category or parsed["category"],
+        "min_price": min_price if min_price is not None else parsed["min_price"],
+        "max_price": max_price if max_price is not None else parsed["max_price"],
+    }
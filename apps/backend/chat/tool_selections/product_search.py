@@ -1,52 +1,154 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from langchain_openai import ChatOpenAI
 from langchain.agents import create_openai_functions_agent
-from langchain.tools import Tool
+from langchain.tools import StructuredTool
 from langchain.agents import AgentExecutor
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema.messages import SystemMessage, HumanMessage, AIMessage
-from products.services import ProductSearchService
+from products.services import ProductSearchService, SearchExecutors
+from pydantic import BaseModel, Field
+from .filters import known_categories, resolve_search_filters
+from .refinement import current_result_recorder, first_page
+from ..speculation import current_speculative_search
+from config.metrics import span
+from django.conf import settings
+import httpx
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
-def create_product_search_agent(api_key: str):
-    """Create a LangChain agent for product search"""
+class ProductSearchInput(BaseModel):
+    """Arguments the LLM can pass to product_search"""
+    query: str = Field(description="What the user is looking for, e.g. 'ergonomic office chair'")
+    category: Optional[str] = Field(None, description="Catalog category, only when the user names one (e.g. 'Furniture')")
+    min_price: Optional[float] = Field(None, description="Minimum price in dollars")
+    max_price: Optional[float] = Field(None, description="Maximum price in dollars")
+
+
+async def search_products(
+    query: str,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = 10
+) -> Dict[str, Any]:
+    """Run the agent's product search without blocking the event loop
+
+    Price ranges and category names in the query fill in filters the LLM
+    did not pass, so filtered searches scan only the matching rows.
+    """
+    service = ProductSearchService()
+    categories = await SearchExecutors.run_db(known_categories)
+    filters = resolve_search_filters(query, category, min_price, max_price, categories)
+    return await service.asearch(
+        **filters,
+        limit=limit,
+        include_signed_urls=True
+    )
+
+
+def create_llm(api_key: str, model: str = "gpt-4") -> ChatOpenAI:
+    """Create the chat model shared by the agent pipelines"""
+    # Keep-alive pool shared by every request made through this client
+    limits = httpx.Limits(
+        max_connections=getattr(settings, 'OPENAI_MAX_CONNECTIONS', 100),
+        max_keepalive_connections=getattr(settings, 'OPENAI_MAX_KEEPALIVE_CONNECTIONS', 20),
+        keepalive_expiry=getattr(settings, 'OPENAI_KEEPALIVE_EXPIRY', 60)
+    )
+
+    # Create LangChain chat model with minimal configuration
+    return ChatOpenAI(
+        api_key=api_key,
+        model=model,
+        temperature=0.1,
+        streaming=True,  # Emit token callbacks for WebSocket streaming
+        http_client=httpx.Client(limits=limits),
+        http_async_client=httpx.AsyncClient(limits=limits)
+    )
+
 
-    def product_search(query: str) -> str:
+def create_product_search_tool() -> StructuredTool:
+    """Create the product_search tool"""
+
+    def product_search(
+        query: str,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> str:
         """Search for products in the catalog.
 
         Args:
             query: The search query (e.g., "blue shirts", "office chairs")
+            category: Optional catalog category filter
+            min_price: Optional minimum price
+            max_price: Optional maximum price
         """
-        logger.debug(f"Product search called with: query={query}")
+        logger.debug(f"Product search called with: query={query}, category={category}, min_price={min_price}, max_price={max_price}")
 
-        # Initialize service and perform search
+        # Cheap handle; embedding models are shared through the registry
         service = ProductSearchService()
+        filters = resolve_search_filters(query, category, min_price, max_price, known_categories())
         results = service.search(
-            query=query,
+            **filters,
             limit=10,
             include_signed_urls=True
         )
 
-        return json.dumps(results)
+        with span("json_encode"):
+            return json.dumps(results)
 
-    # Create LangChain chat model with minimal configuration
-    llm = ChatOpenAI(
-        api_key=api_key,
-        model="gpt-4",
-        temperature=0.1
-    )
+    async def aproduct_search(
+        query: str,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> str:
+        """Async variant of product_search used by AgentExecutor.ainvoke.
 
-    # Create the product search tool
-    product_search_tool = Tool(
-        name="product_search",
+        Embedding and database work run on bounded thread pools so a search
+        never blocks the event loop serving other WebSockets.
+        """
+        logger.debug(f"Async product search called with: query={query}, category={category}, min_price={min_price}, max_price={max_price}")
+
+        # Serve from the consumer's speculative search when the query matches;
+        # it only parsed the raw message, so skip it when the LLM passed filters
+        speculative = current_speculative_search.get()
+        results = None
+        if speculative is not None and category is None and min_price is None and max_price is None:
+            results = await speculative.result_for(query)
+
+        # Fetch extra candidates for follow-up refinement; the LLM still sees one page
+        recorder = current_result_recorder.get()
+        if results is None:
+            limit = recorder.candidates if recorder is not None else 10
+            results = await search_products(query, category, min_price, max_price, limit=limit)
+        if recorder is not None:
+            recorder.record(query, results)
+            results = first_page(results, recorder.page_size)
+
+        with span("json_encode"):
+            return json.dumps(results)
+
+    return StructuredTool.from_function(
         func=product_search,
+        coroutine=aproduct_search,
+        name="product_search",
         description="""Search for products in the catalog. Use this tool for ANY product-related query.
-        The tool accepts a query parameter for searching products."""
+        Put what the user wants in query and pass category, min_price and max_price when the user
+        states them (e.g. "chairs under $200" -> query="chairs", max_price=200).""",
+        args_schema=ProductSearchInput
     )
 
+
+def create_product_search_agent(api_key: str):
+    """Create a LangChain agent for product search"""
+    llm = create_llm(api_key)
+
+    # Create the product search tool
+    product_search_tool = create_product_search_tool()
+
     # Create and return the agent using the new method
     tools = [product_search_tool]
 
@@ -0,0 +1,162 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+import re
+from .filters import match_category, parse_search_filters
+
+logger = logging.getLogger(__name__)
+
+# Recorder for the product searches run during the current agent turn
+current_result_recorder: ContextVar[Optional["SearchResultRecorder"]] = ContextVar(
+    "current_result_recorder", default=None
+)
+
+_SORT_CUES = [
+    (re.compile(r"\b(?:cheapest|lowest price[sd]?|sort(?:ed)? by price|price low to high)\b", re.I), "price_asc"),
+    (re.compile(r"\b(?:most expensive|highest price[sd]?|price high to low)\b", re.I), "price_desc"),
+    (re.compile(r"\b(?:best match(?:es)?|most relevant|by relevance)\b", re.I), "relevance"),
+]
+_CHEAPER = re.compile(r"\b(?:cheaper|less expensive|lower priced|more affordable|budget)\b", re.I)
+_PRICIER = re.compile(r"\b(?:more expensive|pricier|higher end|premium)\b", re.I)
+_NEXT_PAGE = re.compile(r"\b(?:show (?:me )?more|more (?:results|options|products)|next(?: page)?|see more)\b", re.I)
+
+# Words that can surround a refinement without asking for anything new
+_FILLER = {
+    "a", "about", "all", "and", "any", "are", "can", "could", "do", "from", "have", "i", "in", "is", "it",
+    "just", "me", "of", "ok", "okay", "one", "ones", "only", "options", "please", "price", "prices",
+    "products", "results", "see", "show", "some", "sort", "sorted", "that", "the", "them", "then", "these",
+    "those", "to", "what", "which", "with", "want", "you", "now", "items", "list", "by", "order",
+}
+
+
+class SearchResultRecorder:
+    """Collects the product searches run by the tool during one agent turn"""
+
+    def __init__(self, candidates: int = 30, page_size: int = 10):
+        self.candidates = candidates
+        # The LLM and client see one page; ResultSet pages through the rest
+        self.page_size = page_size
+        self.searches: List[Dict[str, Any]] = []
+
+    def record(self, query: str, results: Dict[str, Any]):
+        self.searches.append({"query": query, "results": results, "page_size": self.page_size})
+
+
+def first_page(results: Dict[str, Any], page_size: int) -> Dict[str, Any]:
+    """Trim a search result to its first page (without modifying the cached original)"""
+    data = results.get("data", [])[:page_size]
+    return {**results, "data": data, "metadata": {**results.get("metadata", {}), "total_results": len(data)}}
+
+
+def parse_refinement(message: str, categories: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """Read a follow-up as a refinement of the last results, or None
+
+    Only messages made entirely of refinement cues (price bounds, a category
+    present in the results, sort/page requests, "cheaper"/"pricier") and
+    filler words qualify; anything naming something new needs a real search.
+    """
+    categories = list(categories)
+    filters = parse_search_filters(message, categories)
+    refinement: Dict[str, Any] = {
+        key: filters[key] for key in ("category", "min_price", "max_price") if filters[key] is not None
+    }
+
+    # Price phrases are already removed; take out the other cues and see what is left
+    text = filters["query"]
+    if text == message and refinement.keys() & {"min_price", "max_price"}:
+        # The message was nothing but a price phrase
+        text = ""
+    for pattern, order in _SORT_CUES:
+        if pattern.search(text):
+            refinement["sort"] = order
+            text = pattern.sub(" ", text)
+    if _PRICIER.search(text):
+        refinement["relative"] = "pricier"
+        text = _PRICIER.sub(" ", text)
+    if _CHEAPER.search(text):
+        refinement["relative"] = "cheaper"
+        text = _CHEAPER.sub(" ", text)
+    if _NEXT_PAGE.search(text):
+        refinement["page"] = "next"
+        text = _NEXT_PAGE.sub(" ", text)
+
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    if refinement.get("category"):
+        words = [word for word in words if match_category(word, [refinement["category"]]) is None]
+    if not refinement or any(word not in _FILLER for word in words):
+        return None
+    return refinement
+
+
+class ResultSet:
+    """Candidates from the session's last product search, refined in memory
+
+    Filters narrow the current view, sorts reorder it and "next" pages
+    through it. A refinement that leaves nothing returns None so the caller
+    can fall back to a new search.
+    """
+
+    def __init__(self, query: str, results: Dict[str, Any], page_size: int = 10):
+        self.query = query
+        self.metadata = results.get("metadata", {})
+        self.products: List[Dict[str, Any]] = list(results.get("data", []))
+        self.view = list(self.products)
+        self.page_size = page_size
+        self.offset = 0
+
+    def categories(self) -> List[str]:
+        return sorted({product["category"] for product in self.products})
+
+    def refine(self, refinement: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply a refinement from parse_refinement and return the page to show"""
+        if set(refinement) == {"page"}:
+            if self.offset + self.page_size >= len(self.view):
+                return None
+            self.offset += self.page_size
+            return self._page()
+
+        view = list(self.view)
+        if refinement.get("category"):
+            view = [product for product in view if product["category"] == refinement["category"]]
+        if refinement.get("min_price") is not None:
+            view = [product for product in view if product["price"] >= refinement["min_price"]]
+        if refinement.get("max_price") is not None:
+            view = [product for product in view if product["price"] <= refinement["max_price"]]
+
+        relative = refinement.get("relative")
+        if relative and len(view) > 1:
+            # "Cheaper"/"pricier" split what is shown now at its median price
+            prices = sorted(product["price"] for product in view[:self.page_size])
+            median = prices[len(prices) // 2]
+            if relative == "cheaper":
+                view = [product for product in view if product["price"] < median]
+            else:
+                view = [product for product in view if product["price"] > median]
+
+        order = refinement.get("sort") or {"cheaper": "price_asc", "pricier": "price_desc"}.get(relative)
+        if order == "price_asc":
+            view.sort(key=lambda product: product["price"])
+        elif order == "price_desc":
+            view.sort(key=lambda product: product["price"], reverse=True)
+        elif order == "relevance":
+            ranks = {id(product): rank for rank, product in enumerate(self.products)}
+            view.sort(key=lambda product: ranks[id(product)])
+
+        if not view:
+            return None
+        self.view = view
+        self.offset = 0
+        return self._page()
+
+    def _page(self) -> Dict[str, Any]:
+        data = self.view[self.offset:self.offset + self.page_size]
+        return {
+            "data": data,
+            "metadata": {
+                **self.metadata,
+                "search_type": "refined",
+                "total_results": len(data),
+                "matching_results": len(self.view),
+                "offset": self.offset
+            }
+        }
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+from langchain.schema import AgentAction
+from langchain.schema.messages import SystemMessage, HumanMessage, BaseMessage
+from .product_search import create_llm, create_product_search_tool
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_INSTRUCTIONS = """You are a product search assistant. The catalog search below was run for the user's latest message.
+Answer using only these results; if none fit, say so and suggest a different search.
+
+Search results:
+{results}"""
+
+
+def compact_results(results: Dict[str, Any], max_description: int = 160) -> str:
+    """Render search results as a short bullet list for the prompt"""
+    lines = []
+    for product in results.get("data", []):
+        description = product["description"]
+        if len(description) > max_description:
+            description = description[:max_description].rstrip() + "..."
+        lines.append(f"- {product['name']} ({product['category']}, ${product['price']:.2f}): {description}")
+    return "\n".join(lines) or "(no matching products)"
+
+
+class RetrievalAgent:
+    """Retrieve-then-answer pipeline: one search, then a single LLM call.
+
+    Unlike the OpenAI-functions AgentExecutor, which needs one LLM call to
+    choose the tool and another to summarize, this always searches with the
+    user's message and answers in a single call. ainvoke returns the same
+    shape as AgentExecutor so the consumer is unchanged.
+    """
+
+    def __init__(self, llm, search_tool):
+        self.llm = llm
+        self.search_tool = search_tool
+
+    async def ainvoke(self, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        user_message = inputs["input"]
+        chat_history: List[BaseMessage] = list(inputs.get("chat_history") or [])
+
+        # Run through the tool so callbacks (tool_result frames) still fire
+        tool_output = await self.search_tool.ainvoke({"query": user_message}, config=config)
+        results = json.loads(tool_output)
+
+        # Keep the widget's system prompt first, then the retrieved context
+        messages = []
+        if chat_history and isinstance(chat_history[0], SystemMessage):
+            messages.append(chat_history.pop(0))
+        messages.append(SystemMessage(content=RETRIEVAL_INSTRUCTIONS.format(results=compact_results(results))))
+        messages.extend(chat_history)
+        if not chat_history or not isinstance(chat_history[-1], HumanMessage) or chat_history[-1].content != user_message:
+            messages.append(HumanMessage(content=user_message))
+
+        response = await self.llm.ainvoke(messages, config=config)
+
+        action = AgentAction(
+            tool=self.search_tool.name,
+            tool_input={"query": user_message},
+            log="Retrieved products before answering"
+        )
+        return {
+            "output": response.content,
+            "intermediate_steps": [(action, tool_output)]
+        }
+
+
+def create_retrieval_agent(api_key: str) -> RetrievalAgent:
+    """Create the single-LLM-call retrieve-then-answer pipeline"""
+    return RetrievalAgent(create_llm(api_key), create_product_search_tool())
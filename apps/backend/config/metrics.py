@@ -0,0 +1,184 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Histograms and counters are process-local; collectors registered with
+``register_collector`` expose component ``stats()`` dicts as gauges.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Tuple
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry_lock = threading.Lock()
+_metrics: Dict[str, "Metric"] = {}
+_collectors: Dict[str, Callable[[], Dict]] = {}
+
+# Per-request stage timings (stage -> milliseconds), set by collect_timings
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("current_timings", default=None)
+
+
+class Metric(ABC):
+    """Base class for labelled metrics"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _metrics[name] = self
+
+    def _labels(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def _format_labels(self, values: Tuple[str, ...], extra: Dict[str, str] = None) -> str:
+        pairs = list(zip(self.labelnames, values)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    @abstractmethod
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format"""
+
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._labels(labels), 0)
+
+    def render(self) -> str:
+        with self._lock:
+            values = dict(self._values)
+        return "\n".join(f"{self.name}{self._format_labels(key)} {value}" for key, value in values.items())
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._series.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            series = {key: {**data, "buckets": list(data["buckets"])} for key, data in self._series.items()}
+        for key, data in series.items():
+            for bound, count in zip(self.buckets, data["buckets"]):
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': str(bound)})} {count}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {data['count']}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {data['sum']}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {data['count']}")
+        return "\n".join(lines)
+
+
+STAGE_DURATION = Histogram(
+    "chat_stage_duration_seconds",
+    "Latency of each chat pipeline stage",
+    labelnames=("stage",)
+)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram and the current request timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_stage(stage: str, seconds: float):
+    """Record an already-measured stage duration"""
+    STAGE_DURATION.observe(seconds, stage=stage)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 3)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Collect stage timings (in ms) recorded in this context, including executor threads"""
+    timings: Dict[str, float] = {}
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def register_collector(name: str, collect: Callable[[], Dict]):
+    """Expose a component's stats() dict as gauges named <name>_<key>[_<subkey>]"""
+    with _registry_lock:
+        _collectors[name] = collect
+
+
+def _sanitize(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name).strip("_").lower()
+
+
+def _flatten(prefix: str, stats: Dict) -> Iterator[Tuple[str, float]]:
+    for key, value in stats.items():
+        name = f"{prefix}_{_sanitize(str(key))}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def render_prometheus() -> str:
+    """Render every metric and collector in the Prometheus text format"""
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = dict(_collectors)
+
+    blocks = []
+    for metric in metrics:
+        body = metric.render()
+        blocks.append(f"# HELP {metric.name} {metric.documentation}\n# TYPE {metric.name} {metric.kind}" + (f"\n{body}" if body else ""))
+
+    for name, collect in collectors.items():
+        try:
+            gauges = list(_flatten(_sanitize(name), collect()))
+        except Exception:
+            continue
+        blocks.extend(f"# TYPE {gauge} gauge\n{gauge} {value}" for gauge, value in gauges)
+
+    return "\n".join(blocks) + "\n"
+
+
+def metrics_view(request):
+    """Serve all metrics for Prometheus scraping"""
+    from django.http import HttpResponse
+
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
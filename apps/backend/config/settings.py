@@ -314,11 +314,85 @@ if DEBUG:
 # Vector Database Configuration
 VECTOR_EMBEDDING_DIMENSION = 768  # Dimension for nomic embeddings
 
+# Load embedding models in the background when the chat app starts
+EMBEDDING_MODEL_WARMUP = env.bool('EMBEDDING_MODEL_WARMUP', True)
+# The vision model is loaded on the first image search; disable it on text-only workers
+EMBEDDING_VISION_ENABLED = env.bool('EMBEDDING_VISION_ENABLED', True)
+
+# Query embedding cache: in-process LRU plus optional shared Redis tier (CHANNEL_LAYERS host)
+EMBEDDING_CACHE_SIZE = env.int('EMBEDDING_CACHE_SIZE', 2048)
+EMBEDDING_CACHE_TTL = env.int('EMBEDDING_CACHE_TTL', 24 * 60 * 60)  # seconds
+EMBEDDING_CACHE_REDIS = env.bool('EMBEDDING_CACHE_REDIS', False)
+EMBEDDING_CACHE_VERSION = env('EMBEDDING_CACHE_VERSION', default='1')  # Bump when the embedding pipeline changes
+
+# Batch concurrent query embeddings into one forward pass
+EMBEDDING_BATCHING = env.bool('EMBEDDING_BATCHING', True)
+EMBEDDING_BATCH_MAX_SIZE = env.int('EMBEDDING_BATCH_MAX_SIZE', 16)
+EMBEDDING_BATCH_MAX_WAIT_MS = env.float('EMBEDDING_BATCH_MAX_WAIT_MS', 5)
+
+# Default ANN recall/latency knobs, overridable per search call
+PRODUCT_SEARCH_HNSW_EF_SEARCH = env.int('PRODUCT_SEARCH_HNSW_EF_SEARCH', 40)
+PRODUCT_SEARCH_IVFFLAT_PROBES = env.int('PRODUCT_SEARCH_IVFFLAT_PROBES', None)
+# ef_search is raised to at least PRODUCT_SEARCH_CANDIDATES; filters drop rows after the HNSW
+# walk, so filtered searches scale it further or (exact scan) bypass the index for full recall
+PRODUCT_SEARCH_FILTERED_EF_SEARCH_FACTOR = env.int('PRODUCT_SEARCH_FILTERED_EF_SEARCH_FACTOR', 4)
+PRODUCT_SEARCH_FILTERED_EXACT_SCAN = env.bool('PRODUCT_SEARCH_FILTERED_EXACT_SCAN', False)
+
+# Thread pools that keep blocking search work off the ASGI event loop
+# With batching on, embedding workers mostly wait on the batcher, so this also caps the batch size
+PRODUCT_SEARCH_EMBEDDING_WORKERS = env.int('PRODUCT_SEARCH_EMBEDDING_WORKERS', 8)
+PRODUCT_SEARCH_DB_WORKERS = env.int('PRODUCT_SEARCH_DB_WORKERS', 4)
+PRODUCT_SEARCH_CACHE_WORKERS = env.int('PRODUCT_SEARCH_CACHE_WORKERS', 4)
+
+# Hybrid ranking: 'rrf' (reciprocal rank fusion) or 'weighted' score fusion
+PRODUCT_SEARCH_FUSION = env('PRODUCT_SEARCH_FUSION', default='rrf')
+PRODUCT_SEARCH_CANDIDATES = env.int('PRODUCT_SEARCH_CANDIDATES', 100)  # Top-K pulled from each index
+PRODUCT_SEARCH_RRF_K = env.int('PRODUCT_SEARCH_RRF_K', 60)
+PRODUCT_SEARCH_RESULT_CACHE = env.bool('PRODUCT_SEARCH_RESULT_CACHE', True)  # Invalidated by catalog changes
+PRODUCT_SEARCH_RESULT_CACHE_SIZE = env.int('PRODUCT_SEARCH_RESULT_CACHE_SIZE', 1024)
+PRODUCT_SEARCH_RESULT_CACHE_TTL = env.int('PRODUCT_SEARCH_RESULT_CACHE_TTL', 5 * 60)  # seconds; keep below the signed URL lifetime
+PRODUCT_SEARCH_RESULT_CACHE_REDIS = env.bool('PRODUCT_SEARCH_RESULT_CACHE_REDIS', False)  # Share results across workers
+
 # Site Framework (required for Allauth)
 SITE_ID = 1
 
 # OpenAI Configuration
 OPENAI_API_KEY = env('OPENAI_API_KEY', default='')
+# HTTP connection pool shared by all chat connections
+OPENAI_MAX_CONNECTIONS = env.int('OPENAI_MAX_CONNECTIONS', 100)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = env.int('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 20)
+OPENAI_KEEPALIVE_EXPIRY = env.float('OPENAI_KEEPALIVE_EXPIRY', 60)  # seconds
+
+# Chat consumer settings
+# 'agent': OpenAI-functions agent (tool choice + summary, 2+ LLM calls)
+# 'retrieval': search with the user's message, then answer in a single LLM call
+CHAT_AGENT_MODE = env('CHAT_AGENT_MODE', default='agent')
+CHAT_STREAMING = env.bool('CHAT_STREAMING', True)  # Send delta/tool_start/tool_end frames before the final message
+CHAT_EARLY_TOOL_RESULTS = env.bool('CHAT_EARLY_TOOL_RESULTS', True)  # Send tool_result frames as soon as a tool returns
+CHAT_INCLUDE_TIMINGS = env.bool('CHAT_INCLUDE_TIMINGS', False)  # Attach per-stage latencies as metadata.timings
+# Conversation history store: 'memory' (per worker), 'redis' (CHANNEL_LAYERS host) or 'database' (Message table)
+CHAT_HISTORY_STORE = env('CHAT_HISTORY_STORE', default='memory')
+CHAT_HISTORY_MAX_MESSAGES = env.int('CHAT_HISTORY_MAX_MESSAGES', 50)
+CHAT_HISTORY_TTL = env.int('CHAT_HISTORY_TTL', 24 * 60 * 60)  # seconds
+CHAT_HISTORY_TOKEN_BUDGET = env.int('CHAT_HISTORY_TOKEN_BUDGET', 3000)  # History tokens sent to the agent per turn
+CHAT_HISTORY_SUMMARIZE = env.bool('CHAT_HISTORY_SUMMARIZE', False)  # Fold evicted turns into a rolling summary
+CHAT_SUMMARY_MODEL = env('CHAT_SUMMARY_MODEL', default='gpt-3.5-turbo')
+CHAT_INBOX_SIZE = env.int('CHAT_INBOX_SIZE', 5)  # Queued messages per connection before "busy" frames
+CHAT_COALESCE_WINDOW_MS = env.int('CHAT_COALESCE_WINDOW_MS', 0)  # Extra wait to merge rapid consecutive messages
+CHAT_RESPONSE_CACHE = env.bool('CHAT_RESPONSE_CACHE', False)  # Reuse answers to near-duplicate opening questions
+CHAT_RESPONSE_CACHE_SIZE = env.int('CHAT_RESPONSE_CACHE_SIZE', 512)
+CHAT_RESPONSE_CACHE_TTL = env.int('CHAT_RESPONSE_CACHE_TTL', 15 * 60)  # seconds; keep below the signed URL lifetime
+CHAT_RESPONSE_CACHE_SIMILARITY = env.float('CHAT_RESPONSE_CACHE_SIMILARITY', 0.95)
+CHAT_REFINE_RESULTS = env.bool('CHAT_REFINE_RESULTS', True)  # Answer "only the cheaper ones" etc. from the last search
+CHAT_REFINE_CANDIDATES = env.int('CHAT_REFINE_CANDIDATES', 30)  # Results kept per search for refinement
+CHAT_REFINE_PAGE_SIZE = env.int('CHAT_REFINE_PAGE_SIZE', 10)
+# Persist messages and tool executions through a write-behind buffer
+CHAT_LOG_ENABLED = env.bool('CHAT_LOG_ENABLED', True)
+CHAT_LOG_BUFFER_SIZE = env.int('CHAT_LOG_BUFFER_SIZE', 100)  # Flush when this many records are pending
+CHAT_LOG_FLUSH_INTERVAL = env.float('CHAT_LOG_FLUSH_INTERVAL', 2.0)  # ...or at least this often (seconds)
+# Start a product search with the raw message in parallel with the agent's first LLM call
+CHAT_SPECULATIVE_SEARCH = env.bool('CHAT_SPECULATIVE_SEARCH', False)
+CHAT_SPECULATIVE_SIMILARITY = env.float('CHAT_SPECULATIVE_SIMILARITY', 0.9)  # Min cosine similarity to reuse it
 
 # MinIO Configuration
 MINIO_ROOT_USER = env('MINIO_ROOT_USER', default='minioadmin')
@@ -327,6 +401,10 @@ MINIO_HOST = env('MINIO_HOST', default='localhost')
 MINIO_PORT = env('MINIO_PORT', default='9000')
 MINIO_USE_SSL = env.bool('MINIO_USE_SSL', False)
 MINIO_BUCKET_NAME = env('MINIO_BUCKET_NAME', default='chat-files')
+MINIO_REGION = env('MINIO_REGION', default='us-east-1')
+MINIO_SIGNED_URL_TTL_HOURS = env.int('MINIO_SIGNED_URL_TTL_HOURS', 12)
+# Signed URLs expiring within this window are regenerated on the next search
+MINIO_SIGNED_URL_REFRESH_MARGIN_MINUTES = env.int('MINIO_SIGNED_URL_REFRESH_MARGIN_MINUTES', 60)
 
 # Ignore logfire warning
 os.environ['LOGFIRE_IGNORE_NO_CONFIG'] = '1'
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from config.metrics import metrics_view
 
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -26,4 +27,7 @@ urlpatterns = [
 
     # Chat Routes
     path('api/chat/', include('chat.urls', namespace='chat')),
+
+    # Prometheus metrics
+    path('metrics/', metrics_view, name='metrics'),
 ]
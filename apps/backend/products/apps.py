@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -6,5 +7,9 @@ class ProductsConfig(AppConfig):
 
     def ready(self):
         """Initialize app when Django starts"""
-        # Import signal handlers if needed
-        pass
+        from .models import Product
+        from .signals import bump_catalog_version, install_search_vector_trigger
+
+        post_migrate.connect(install_search_vector_trigger, sender=self)
+        post_save.connect(bump_catalog_version, sender=Product)
+        post_delete.connect(bump_catalog_version, sender=Product)
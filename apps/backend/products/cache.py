@@ -0,0 +1,294 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from django.conf import settings
+from config.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_COALESCED = Counter(
+    "single_flight_coalesced_total",
+    "Calls served by joining an identical computation already in flight",
+    labelnames=("call",)
+)
+
+_redis_lock = threading.Lock()
+_redis_client = None
+
+
+def get_redis_client():
+    """Get a process-wide Redis client for the host configured in CHANNEL_LAYERS
+
+    Returns None when redis-py is unavailable or no Redis host is configured
+    (e.g. the in-memory channel layer used in tests).
+    """
+    global _redis_client
+    if _redis_client is not None:
+        return _redis_client
+
+    with _redis_lock:
+        if _redis_client is not None:
+            return _redis_client
+
+        try:
+            import redis
+        except ImportError:
+            logger.warning("redis package not installed; shared cache tier disabled")
+            return None
+
+        layer_config = getattr(settings, 'CHANNEL_LAYERS', {}).get('default', {}).get('CONFIG', {})
+        hosts = layer_config.get('hosts') or []
+        if not hosts:
+            return None
+
+        host = hosts[0]
+        if isinstance(host, str):
+            _redis_client = redis.Redis.from_url(host)
+        else:
+            _redis_client = redis.Redis(host=host[0], port=host[1])
+        return _redis_client
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """In-process LRU in front of an optional shared Redis tier
+
+    Values found in Redis are copied into the local tier. Redis failures are
+    logged and treated as misses so the cache never breaks the caller.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+        use_redis: bool = False,
+        dumps: Callable[[Any], bytes] = lambda value: json.dumps(value).encode(),
+        loads: Callable[[bytes], Any] = lambda data: json.loads(data),
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        self._dumps = dumps
+        self._loads = loads
+        self._counts = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value from the local tier, then Redis"""
+        value = self.local.get(key)
+        if value is not None:
+            self._counts["local_hits"] += 1
+            return value
+
+        client = get_redis_client() if self.use_redis else None
+        if client is not None:
+            try:
+                data = client.get(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Redis cache read failed: {str(e)}")
+                data = None
+            if data is not None:
+                value = self._loads(data)
+                self.local.set(key, value)
+                self._counts["redis_hits"] += 1
+                return value
+
+        self._counts["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a value in both tiers"""
+        self.local.set(key, value)
+
+        client = get_redis_client() if self.use_redis else None
+        if client is not None:
+            try:
+                client.set(self._redis_key(key), self._dumps(value), ex=int(self.ttl) if self.ttl else None)
+            except Exception as e:
+                logger.warning(f"Redis cache write failed: {str(e)}")
+
+    def clear(self):
+        """Clear the local tier (shared entries expire through their TTL)"""
+        self.local.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the local tier size"""
+        return {**self._counts, "size": len(self.local)}
+
+
+class CatalogVersion:
+    """Counter bumped on every catalog change
+
+    Caches of catalog-derived data (search results, assistant answers) put the
+    version in their keys, so a bump makes every older entry unreachable.
+    Kept in Redis when available so all processes see the bump.
+    """
+    REDIS_KEY = "products:catalog_version"
+    _lock = threading.Lock()
+    _local = 0
+
+    @classmethod
+    def get(cls) -> int:
+        """Get the current catalog version"""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return int(client.get(cls.REDIS_KEY) or 0)
+            except Exception as e:
+                logger.warning(f"Redis catalog version read failed: {str(e)}")
+        return cls._local
+
+    @classmethod
+    def bump(cls) -> None:
+        """Invalidate catalog-derived cache entries"""
+        with cls._lock:
+            cls._local += 1
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.incr(cls.REDIS_KEY)
+            except Exception as e:
+                logger.warning(f"Redis catalog version bump failed: {str(e)}")
+
+
+class SingleFlight:
+    """Share one in-flight computation among concurrent callers with the same key
+
+    ``do`` is for worker threads and ``ado`` for coroutines on the event loop;
+    the two do not coalesce with each other. Results are not kept once the
+    computation finishes (that is the caches' job).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        # key -> [task, number of callers awaiting it]
+        self._tasks: Dict[str, List] = {}
+        self._counts = {"calls": 0, "coalesced": 0}
+
+    def _record(self, coalesced: bool):
+        # Called with self._lock held
+        self._counts["calls"] += 1
+        if coalesced:
+            self._counts["coalesced"] += 1
+            SINGLE_FLIGHT_COALESCED.inc(call=self.name)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Call fn, or wait for the identical call already running in another thread"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self._record(coalesced=not leader)
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn(), or join the identical coroutine call already in flight
+
+        The shared task is cancelled only when every caller waiting on it has
+        been cancelled, so one client disconnecting does not fail the others.
+        """
+        with self._lock:
+            entry = self._tasks.get(key)
+            leader = entry is None
+            if leader:
+                entry = self._tasks[key] = [asyncio.ensure_future(fn()), 0]
+                entry[0].add_done_callback(lambda _: self._forget(key, entry))
+            entry[1] += 1
+            self._record(coalesced=not leader)
+
+        task = entry[0]
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            with self._lock:
+                entry[1] -= 1
+                abandoned = entry[1] == 0 and not task.done()
+                if abandoned and self._tasks.get(key) is entry:
+                    # Later callers must start afresh rather than join a cancelled task
+                    del self._tasks[key]
+            if abandoned:
+                task.cancel()
+            raise
+
+    def _forget(self, key: str, entry: List):
+        with self._lock:
+            if self._tasks.get(key) is entry:
+                del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get call and coalesced-call counters and the number of calls in flight"""
+        with self._lock:
+            return {**self._counts, "in_flight": len(self._calls) + len(self._tasks)}
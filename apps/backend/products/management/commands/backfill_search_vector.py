@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.contrib.postgres.search import SearchVector
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Populates Product.search_vector in chunks for rows written before the trigger existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows updated per statement')
+        parser.add_argument('--all', action='store_true', help='Rebuild every row, not only empty ones')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Product.objects.order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        # Same weights as the search_vector trigger
+        vector = (
+            SearchVector('name', weight='A', config='english') +
+            SearchVector('description', weight='B', config='english') +
+            SearchVector('category', weight='C', config='english')
+        )
+
+        updated = 0
+        last_id = None
+        while True:
+            # Keyset pagination keeps each chunk an index range scan
+            chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+            ids = list(chunk.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            updated += Product.objects.filter(id__in=ids).update(search_vector=vector)
+            last_id = ids[-1]
+            self.stdout.write(f'Updated {updated} products...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled search_vector for {updated} products'))
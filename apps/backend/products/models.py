@@ -1,14 +1,9 @@
 import uuid
 import logging
-from datetime import timedelta
 from django.db import models
 from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
-from pgvector.django import VectorField
-from django.conf import settings
-from minio import Minio
-from urllib.parse import urlparse
-import os
+from pgvector.django import VectorField, HnswIndex
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +17,11 @@ class Product(models.Model):
 
     # Image fields
     signed_url = models.CharField(max_length=1024)  # Presigned URL for frontend display
+    signed_url_expires_at = models.DateTimeField(null=True, blank=True)  # When signed_url stops working
     image_key = models.CharField(max_length=255)   # MinIO storage key
 
     # Search fields
-    search_vector = SearchVectorField(null=True)  # For text search
+    search_vector = SearchVectorField(null=True)  # For text search, maintained by a database trigger
     embedding = VectorField(dimensions=768)  # For nomic embeddings
 
     # Metadata
@@ -37,36 +33,22 @@ class Product(models.Model):
         indexes = [
             GinIndex(fields=['search_vector']),  # For faster text search
             models.Index(fields=['category']),  # For category filtering
+            HnswIndex(  # For approximate nearest-neighbour search on embeddings
+                name='product_embedding_hnsw_idx',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
         ]
 
     def __str__(self):
         return self.name
 
     def refresh_signed_url(self):
-        """Refresh the presigned URL for the product image"""
-        try:
-            client = Minio(
-                "localhost:9000",
-                access_key=settings.MINIO_ROOT_USER,
-                secret_key=settings.MINIO_ROOT_PASSWORD,
-                secure=settings.MINIO_USE_SSL
-            )
+        """Regenerate the presigned URL for the product image"""
+        from .signed_urls import SignedUrlService
 
-            logger.info(f"MinIO client initialized with bucket: {settings.MINIO_BUCKET_NAME}")
-            logger.info(f"Generating signed URL for object: {self.image_key}")
-
-            # Generate presigned URL valid for 12 hours
-            url = client.presigned_get_object(
-                settings.MINIO_BUCKET_NAME,
-                self.image_key,
-                expires=timedelta(hours=12)  # Use timedelta instead of seconds
-            )
-
-            logger.info(f"Generated signed URL: {url}")
-
-            self.signed_url = url
-            self.save(update_fields=['signed_url'])
-            return url
-        except Exception as e:
-            logger.error(f"Error generating signed URL: {str(e)}")
-            return None
+        if SignedUrlService.refresh([self], force=True):
+            return self.signed_url
+        return None
@@ -1,36 +1,406 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import queue
+import resource
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
 from django.db.models import Q
-from django.contrib.postgres.search import SearchQuery, SearchRank
 import torch
 import torch.nn.functional as F
 from transformers import AutoTokenizer, AutoModel, AutoImageProcessor
 from PIL import Image
 import numpy as np
+from config.metrics import register_collector, span
 from .models import Product
-from pgvector.django import L2Distance
+from .cache import CatalogVersion, SingleFlight, TieredCache, get_redis_client
+from .signed_urls import SignedUrlService
+
+logger = logging.getLogger(__name__)
+
+TEXT_MODEL_NAME = 'nomic-ai/nomic-embed-text-v1.5'
+VISION_MODEL_NAME = 'nomic-ai/nomic-embed-vision-v1.5'
+HNSW_MAX_EF_SEARCH = 1000  # pgvector's upper bound for hnsw.ef_search
+
+
+def _load_text_model() -> Tuple[Any, Any]:
+    """Load the nomic text tokenizer and model"""
+    tokenizer = AutoTokenizer.from_pretrained(TEXT_MODEL_NAME)
+    model = AutoModel.from_pretrained(TEXT_MODEL_NAME, trust_remote_code=True)
+    model.eval()
+    return tokenizer, model
+
+
+def _load_vision_model() -> Tuple[Any, Any]:
+    """Load the nomic image processor and vision model"""
+    processor = AutoImageProcessor.from_pretrained(VISION_MODEL_NAME)
+    model = AutoModel.from_pretrained(VISION_MODEL_NAME, trust_remote_code=True)
+    model.eval()
+    return processor, model
+
+
+class EmbeddingModelRegistry:
+    """Process-wide registry that loads each embedding model once.
+
+    Models are loaded on first use (or by ``warmup``) and shared by every
+    ``ProductSearchService`` in the process. Loading is guarded by a lock so
+    concurrent first callers do not load the same weights twice.
+    """
+    _lock = threading.Lock()
+    _models: Dict[str, Tuple[Any, Any]] = {}
+    _metrics: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def get(cls, name: str, loader: Callable[[], Tuple[Any, Any]]) -> Tuple[Any, Any]:
+        """Return the (preprocessor, model) pair for name, loading it if needed"""
+        models = cls._models.get(name)
+        if models is not None:
+            return models
+
+        with cls._lock:
+            # Another thread may have finished loading while we waited
+            models = cls._models.get(name)
+            if models is not None:
+                return models
+
+            logger.info(f"Loading embedding model {name}")
+            started = time.perf_counter()
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            models = loader()
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            model = models[1]
+            cls._metrics[name] = {
+                "load_seconds": time.perf_counter() - started,
+                "parameter_bytes": sum(p.numel() * p.element_size() for p in model.parameters()),
+                # ru_maxrss is reported in kilobytes on Linux
+                "peak_rss_delta_bytes": max(rss_after - rss_before, 0) * 1024,
+            }
+            cls._models[name] = models
+            logger.info(f"Loaded embedding model {name} in {cls._metrics[name]['load_seconds']:.2f}s")
+            return models
+
+    @classmethod
+    def text_model(cls) -> Tuple[Any, Any]:
+        """Get the shared (tokenizer, model) pair for text embeddings"""
+        return cls.get(TEXT_MODEL_NAME, _load_text_model)
+
+    @classmethod
+    def vision_model(cls) -> Tuple[Any, Any]:
+        """Get the shared (image processor, model) pair for image embeddings"""
+        return cls.get(VISION_MODEL_NAME, _load_vision_model)
+
+    @classmethod
+    def vision_enabled(cls) -> bool:
+        """Check whether image embeddings are allowed in this process"""
+        return getattr(settings, 'EMBEDDING_VISION_ENABLED', True)
+
+    @classmethod
+    def warmup(cls, include_vision: bool = False):
+        """Load embedding models ahead of the first search
+
+        Only the text model is loaded by default; the vision model stays lazy
+        unless include_vision is set and vision is enabled.
+        """
+        cls.text_model()
+        if include_vision and cls.vision_enabled():
+            cls.vision_model()
+
+    @classmethod
+    def is_loaded(cls, name: str) -> bool:
+        """Check whether a model has already been loaded in this process"""
+        return name in cls._models
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, float]]:
+        """Get load-time and memory metrics for every loaded model"""
+        return {name: dict(metrics) for name, metrics in cls._metrics.items()}
+
+    @classmethod
+    def clear(cls):
+        """Drop all loaded models (mainly for tests)"""
+        with cls._lock:
+            cls._models.clear()
+            cls._metrics.clear()
+
+
+class SearchExecutors:
+    """Bounded thread pools that keep blocking search work off the event loop
+
+    The 'embedding' pool runs tokenization and the transformer forward pass
+    (torch releases the GIL); the 'db' pool runs ORM queries and URL signing;
+    the 'cache' pool runs Redis reads, so cache hits never queue behind
+    inference. Pool sizes come from PRODUCT_SEARCH_<NAME>_WORKERS.
+    """
+    _lock = threading.Lock()
+    _pools: Dict[str, ThreadPoolExecutor] = {}
+    _in_flight: Dict[str, int] = {}
+
+    @classmethod
+    def pool(cls, name: str) -> ThreadPoolExecutor:
+        """Get (or create) the named pool"""
+        pool = cls._pools.get(name)
+        if pool is None:
+            with cls._lock:
+                pool = cls._pools.get(name)
+                if pool is None:
+                    workers = getattr(settings, f'PRODUCT_SEARCH_{name.upper()}_WORKERS', 4)
+                    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"search-{name}")
+                    cls._pools[name] = pool
+                    cls._in_flight[name] = 0
+        return pool
+
+    @classmethod
+    async def run(cls, name: str, fn: Callable, *args, **kwargs):
+        """Run fn on the named pool and await its result"""
+        pool = cls.pool(name)
+        with cls._lock:
+            cls._in_flight[name] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry context variables (e.g. request timings) into the worker thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(pool, functools.partial(context.run, fn, *args, **kwargs))
+        finally:
+            with cls._lock:
+                cls._in_flight[name] -= 1
+
+    @classmethod
+    async def run_db(cls, fn: Callable, *args, **kwargs):
+        """Run fn on the database pool with Django connection housekeeping"""
+        def call():
+            # Same connection handling as channels' database_sync_to_async
+            close_old_connections()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                close_old_connections()
+
+        return await cls.run('db', call)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        """Get pool sizes, in-flight work and queue depth per pool"""
+        with cls._lock:
+            return {
+                name: {
+                    "workers": pool._max_workers,
+                    "in_flight": cls._in_flight[name],
+                    "queued": max(cls._in_flight[name] - pool._max_workers, 0),
+                }
+                for name, pool in cls._pools.items()
+            }
+
+
+class EmbeddingBatcher:
+    """Collects concurrent text embedding requests into padded batches
+
+    Callers on any thread block on a future while a single worker thread
+    waits up to max_wait seconds (or until max_batch requests arrive), runs
+    one forward pass for the whole batch and resolves each caller's future.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]], max_batch: int = 16, max_wait: float = 0.005):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._embed_batch = embed_batch
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"batches": 0, "items": 0, "largest_batch": 0}
+
+    def embed(self, text: str) -> List[float]:
+        """Get the embedding for text, waiting for its batch to complete"""
+        return self.submit(text).result()
+
+    def submit(self, text: str) -> Future:
+        """Queue text for the next batch and return a future for its embedding"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self._embed_batch(texts)
+            except Exception as e:
+                logger.error(f"Error embedding batch of {len(texts)}: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(batch)
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+
+    def stats(self) -> Dict[str, float]:
+        """Get batch counts, average batch size and queue depth"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["average_batch"] = stats["items"] / stats["batches"] if stats["batches"] else 0.0
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache keys (the nomic tokenizer is uncased)"""
+    return " ".join(text.lower().split())
+
 
 class ProductSearchService:
-    """Service for hybrid product search using pgvector and text search"""
+    """Service for hybrid product search using pgvector and text search
+
+    Instances are cheap handles onto the models held by
+    ``EmbeddingModelRegistry`` and can be created per request or reused.
+    """
+    _embedding_cache: TieredCache = None
+    _embedding_batcher: "EmbeddingBatcher" = None
+    _result_cache: TieredCache = None
+    _embedding_cache_lock = threading.Lock()
+    # Concurrent identical embeddings and searches share one computation
+    _embedding_flight = SingleFlight("embedding")
+    _search_flight = SingleFlight("search")
+
+    @classmethod
+    def embedding_cache(cls) -> TieredCache:
+        """Get the process-wide query embedding cache"""
+        if cls._embedding_cache is None:
+            with cls._embedding_cache_lock:
+                if cls._embedding_cache is None:
+                    cls._embedding_cache = TieredCache(
+                        namespace="product-search:embedding",
+                        max_size=getattr(settings, 'EMBEDDING_CACHE_SIZE', 2048),
+                        ttl=getattr(settings, 'EMBEDDING_CACHE_TTL', 24 * 60 * 60),
+                        use_redis=getattr(settings, 'EMBEDDING_CACHE_REDIS', False),
+                        # float32 bytes are ~5x smaller than JSON in Redis
+                        dumps=lambda value: np.asarray(value, dtype=np.float32).tobytes(),
+                        loads=lambda data: np.frombuffer(data, dtype=np.float32).tolist(),
+                    )
+        return cls._embedding_cache
 
-    def __init__(self):
-        # Initialize text model
-        self.tokenizer = AutoTokenizer.from_pretrained('nomic-ai/nomic-embed-text-v1.5')
-        self.text_model = AutoModel.from_pretrained('nomic-ai/nomic-embed-text-v1.5', trust_remote_code=True)
-        self.text_model.eval()
+    @classmethod
+    def result_cache(cls) -> TieredCache:
+        """Get the process-wide search result cache"""
+        if cls._result_cache is None:
+            with cls._embedding_cache_lock:
+                if cls._result_cache is None:
+                    cls._result_cache = TieredCache(
+                        namespace="product-search:results",
+                        max_size=getattr(settings, 'PRODUCT_SEARCH_RESULT_CACHE_SIZE', 1024),
+                        # Cached results carry signed URLs; keep well below their lifetime
+                        ttl=getattr(settings, 'PRODUCT_SEARCH_RESULT_CACHE_TTL', 5 * 60),
+                        use_redis=getattr(settings, 'PRODUCT_SEARCH_RESULT_CACHE_REDIS', False),
+                    )
+        return cls._result_cache
 
-        # Initialize vision model
-        self.image_processor = AutoImageProcessor.from_pretrained("nomic-ai/nomic-embed-vision-v1.5")
-        self.vision_model = AutoModel.from_pretrained("nomic-ai/nomic-embed-vision-v1.5", trust_remote_code=True)
-        self.vision_model.eval()
+    @classmethod
+    def embedding_batcher(cls) -> EmbeddingBatcher:
+        """Get the process-wide text embedding batcher"""
+        if cls._embedding_batcher is None:
+            with cls._embedding_cache_lock:
+                if cls._embedding_batcher is None:
+                    cls._embedding_batcher = EmbeddingBatcher(
+                        embed_batch=lambda texts: cls()._compute_text_embeddings(texts),
+                        max_batch=getattr(settings, 'EMBEDDING_BATCH_MAX_SIZE', 16),
+                        max_wait=getattr(settings, 'EMBEDDING_BATCH_MAX_WAIT_MS', 5) / 1000,
+                    )
+        return cls._embedding_batcher
+
+    @property
+    def tokenizer(self):
+        """Text tokenizer, shared through the registry"""
+        return EmbeddingModelRegistry.text_model()[0]
+
+    @property
+    def text_model(self):
+        """Text model, shared through the registry"""
+        return EmbeddingModelRegistry.text_model()[1]
+
+    @property
+    def image_processor(self):
+        """Image processor, loaded on first image search"""
+        return self._vision_models()[0]
+
+    @property
+    def vision_model(self):
+        """Vision model, loaded on first image search"""
+        return self._vision_models()[1]
+
+    def _vision_models(self) -> Tuple[Any, Any]:
+        if not EmbeddingModelRegistry.vision_enabled():
+            raise RuntimeError("Image embeddings are disabled (EMBEDDING_VISION_ENABLED=False)")
+        return EmbeddingModelRegistry.vision_model()
+
+    def _embedding_cache_key(self, text: str) -> str:
+        version = getattr(settings, 'EMBEDDING_CACHE_VERSION', '1')
+        digest = hashlib.sha1(normalize_query(text).encode()).hexdigest()
+        return f"{TEXT_MODEL_NAME}:{version}:{digest}"
 
     def _get_text_embedding(self, text: str) -> List[float]:
-        """Get embedding vector for text using nomic-embed-text"""
+        """Get embedding vector for text, served from the embedding cache when possible"""
+        with span("embedding"):
+            cache = self.embedding_cache()
+            key = self._embedding_cache_key(text)
+
+            embedding = cache.get(key)
+            if embedding is None:
+                embedding = self._embedding_flight.do(key, lambda: self._compute_and_cache_embedding(key, text))
+            return embedding
+
+    def _compute_and_cache_embedding(self, key: str, text: str) -> List[float]:
+        embedding = self._compute_text_embedding(normalize_query(text))
+        self.embedding_cache().set(key, embedding)
+        return embedding
+
+    def _compute_text_embedding(self, text: str) -> List[float]:
+        """Get embedding vector for text, batched with concurrent callers when enabled"""
+        if getattr(settings, 'EMBEDDING_BATCHING', True):
+            return self.embedding_batcher().embed(text)
+        return self._compute_text_embeddings([text])[0]
+
+    def _compute_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embedding vectors for a batch of texts using nomic-embed-text"""
         # Add required prefix
-        text_with_prefix = f"search_query: {text}"
+        texts_with_prefix = [f"search_query: {text}" for text in texts]
 
-        # Tokenize and encode
+        # Tokenize and encode (padded to the longest text in the batch)
         encoded_input = self.tokenizer(
-            text_with_prefix,
+            texts_with_prefix,
             padding=True,
             truncation=True,
             return_tensors='pt'
@@ -50,7 +420,7 @@ class ProductSearchService:
         embeddings = F.layer_norm(embeddings, normalized_shape=(embeddings.shape[1],))
         embeddings = F.normalize(embeddings, p=2, dim=1)
 
-        return embeddings[0].numpy().tolist()
+        return embeddings.numpy().tolist()
 
     def _get_image_embedding(self, image: Image) -> List[float]:
         """Get embedding vector for image using nomic-embed-vision"""
@@ -64,23 +434,109 @@ class ProductSearchService:
 
         return embeddings[0].numpy().tolist()
 
-    def _combine_scores(self, text_score: float, vector_score: float, weights: Dict[str, float] = None) -> float:
-        """Combine text and vector search scores
+    def _build_hybrid_sql(self, fusion: str, filters: List[str]) -> str:
+        """Build the single-round-trip hybrid retrieval query
 
-        Args:
-            text_score: Score from text search (0-1)
-            vector_score: Score from vector search (cosine similarity, -1 to 1)
-            weights: Optional dict with 'text' and 'vector' weights (default: equal weights)
+        The text and vector CTEs each pull their top candidates through their
+        own index (GIN on search_vector, HNSW on embedding); the final select
+        fuses both candidate sets and returns the best `limit` rows.
         """
-        weights = weights or {'text': 0.5, 'vector': 0.5}
+        table = connection.ops.quote_name(Product._meta.db_table)
+        where = "".join(f" AND {f}" for f in filters)
+
+        if fusion == 'weighted':
+            # Text rank plus cosine similarity mapped from [-1, 1] to [0, 1]
+            hybrid = (
+                "%(text_weight)s * COALESCE(ts_rank(p.search_vector, plainto_tsquery('english', %(query)s)), 0)"
+                " + %(vector_weight)s * (2 - (p.embedding <=> %(embedding)s::vector)) / 2"
+            )
+        else:
+            # Reciprocal rank fusion over each list's positions
+            hybrid = (
+                "%(text_weight)s * COALESCE(1.0 / (%(rrf_k)s + c.text_pos), 0)"
+                " + %(vector_weight)s * COALESCE(1.0 / (%(rrf_k)s + c.vector_pos), 0)"
+            )
 
-        # Normalize vector score from [-1,1] to [0,1]
-        vector_score = (vector_score + 1) / 2
+        return f"""
+            WITH text_hits AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC) AS text_pos
+                FROM (
+                    SELECT id, ts_rank(search_vector, plainto_tsquery('english', %(query)s)) AS rank
+                    FROM {table}
+                    WHERE search_vector @@ plainto_tsquery('english', %(query)s){where}
+                    ORDER BY rank DESC
+                    LIMIT %(candidates)s
+                ) matches
+            ),
+            vector_hits AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS vector_pos
+                FROM (
+                    SELECT id, embedding <=> %(embedding)s::vector AS distance
+                    FROM {table}
+                    WHERE TRUE{where}
+                    ORDER BY distance
+                    LIMIT %(candidates)s
+                ) nearest
+            ),
+            candidates AS (
+                SELECT COALESCE(t.id, v.id) AS id, t.text_pos, v.vector_pos
+                FROM text_hits t
+                FULL OUTER JOIN vector_hits v ON t.id = v.id
+            )
+            SELECT
+                p.id, p.name, p.description, p.category, p.price,
+                p.signed_url, p.signed_url_expires_at, p.image_key,
+                COALESCE(ts_rank(p.search_vector, plainto_tsquery('english', %(query)s)), 0) AS text_score,
+                1 - (p.embedding <=> %(embedding)s::vector) AS vector_score,
+                {hybrid} AS hybrid_score
+            FROM candidates c
+            JOIN {table} p ON p.id = c.id
+            ORDER BY hybrid_score DESC
+            LIMIT %(limit)s
+        """
 
-        return (
-            weights['text'] * text_score +
-            weights['vector'] * vector_score
-        )
+    def _apply_index_tuning(
+        self,
+        ef_search: int = None,
+        probes: int = None,
+        candidates: int = None,
+        filtered: bool = False
+    ):
+        """Set per-query ANN recall/latency knobs for the current transaction
+
+        An HNSW scan returns at most ef_search rows, so ef_search is raised to
+        at least the number of vector candidates requested. Category/price
+        filters are applied after the index walk and discard rows, so filtered
+        queries scale ef_search by PRODUCT_SEARCH_FILTERED_EF_SEARCH_FACTOR. The
+        result is capped at pgvector's maximum of 1000. With
+        PRODUCT_SEARCH_FILTERED_EXACT_SCAN, filtered queries skip the HNSW index
+        and rank the filtered rows exactly instead: full recall, at the cost of
+        a distance computation per matching row (cheap for selective filters,
+        slow for broad ones).
+        """
+        if ef_search is None:
+            ef_search = getattr(settings, 'PRODUCT_SEARCH_HNSW_EF_SEARCH', None)
+        if probes is None:
+            probes = getattr(settings, 'PRODUCT_SEARCH_IVFFLAT_PROBES', None)
+
+        if candidates is not None:
+            ef_search = max(int(ef_search or 0), int(candidates))
+        if filtered and ef_search is not None:
+            ef_search = int(ef_search * getattr(settings, 'PRODUCT_SEARCH_FILTERED_EF_SEARCH_FACTOR', 4))
+        if ef_search is not None:
+            # pgvector rejects values above its maximum
+            ef_search = min(int(ef_search), HNSW_MAX_EF_SEARCH)
+
+        with connection.cursor() as cursor:
+            # SET LOCAL only lasts until the surrounding transaction ends
+            if ef_search is not None:
+                cursor.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+            if probes is not None:
+                cursor.execute(f"SET LOCAL ivfflat.probes = {int(probes)}")
+            if filtered and getattr(settings, 'PRODUCT_SEARCH_FILTERED_EXACT_SCAN', False):
+                # HNSW only supports plain index scans; the GIN text search and the
+                # category B-tree still run as bitmap scans
+                cursor.execute("SET LOCAL enable_indexscan = off")
 
     def search(
         self,
@@ -91,7 +547,11 @@ class ProductSearchService:
         min_price: float = None,
         max_price: float = None,
         weights: Dict[str, float] = None,
-        include_signed_urls: bool = False
+        include_signed_urls: bool = False,
+        ef_search: int = None,
+        probes: int = None,
+        fusion: str = None,
+        candidates: int = None
     ) -> Dict[str, Any]:
         """Perform hybrid search on products
 
@@ -104,75 +564,192 @@ class ProductSearchService:
             max_price: Optional maximum price filter
             weights: Optional dict with 'text' and 'vector' weights for scoring
             include_signed_urls: Whether to refresh signed URLs in results
+            ef_search: Optional HNSW candidate list size (higher = better recall, slower)
+            probes: Optional number of IVFFlat lists to probe (higher = better recall, slower)
+            fusion: 'rrf' (reciprocal rank fusion) or 'weighted' score fusion
+            candidates: Number of candidates pulled from each index before fusion
 
         Returns:
             Dict containing search results and metadata
         """
-        # Get query embeddings
-        query_embedding = self._get_text_embedding(query)
+        options = dict(
+            limit=limit, category=category, min_price=min_price, max_price=max_price,
+            weights=weights, include_signed_urls=include_signed_urls,
+            ef_search=ef_search, probes=probes, fusion=fusion, candidates=candidates
+        )
+        if self._use_image_query(image_query):
+            # Image queries have no cheap key, so they are neither cached nor coalesced
+            return self._search_by_embedding(
+                query, self._get_text_embedding(query), self._get_image_embedding(image_query), **options
+            )
 
-        # Get image embedding if provided
-        image_embedding = None
-        if image_query:
-            image_embedding = self._get_image_embedding(image_query)
+        cache_key, cached = self._cached_result(query, options)
+        if cached is not None:
+            return cached
 
-        # Base queryset with filters
-        queryset = Product.objects.all()
+        return self._search_flight.do(cache_key, lambda: self._search_and_cache(
+            cache_key, query, self._get_text_embedding(query), None, **options
+        ))
 
-        if category:
-            queryset = queryset.filter(category=category)
-        if min_price is not None:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price is not None:
-            queryset = queryset.filter(price__lte=max_price)
+    async def asearch(self, query: str, image_query: Image = None, **kwargs) -> Dict[str, Any]:
+        """Async variant of search that keeps blocking work off the event loop
 
-        # Text search
-        search_query = SearchQuery(query, config='english')
-        queryset = queryset.annotate(
-            text_rank=SearchRank('search_vector', search_query)
-        )
+        Embedding runs on the embedding pool and SQL/URL signing on the
+        database pool (see SearchExecutors). Accepts the same arguments as search.
+        """
+        if self._use_image_query(image_query):
+            # Image queries have no cheap key, so they are neither cached nor coalesced
+            query_embedding = await SearchExecutors.run('embedding', self._get_text_embedding, query)
+            image_embedding = await SearchExecutors.run('embedding', self._get_image_embedding, image_query)
+            return await SearchExecutors.run_db(
+                self._search_by_embedding, query, query_embedding, image_embedding, **kwargs
+            )
 
-        # Vector search using L2 distance
-        queryset = queryset.annotate(
-            vector_rank=1 - L2Distance('embedding', query_embedding)
+        if get_redis_client() is None:
+            # The catalog version and result cache are both in-process, so check inline
+            cache_key, cached = self._cached_result(query, kwargs)
+        else:
+            # The catalog version and Redis tier are read off the event loop
+            cache_key, cached = await SearchExecutors.run('cache', self._cached_result, query, kwargs)
+        if cached is not None:
+            return cached
+
+        return await self._search_flight.ado(cache_key, lambda: self._asearch_uncached(cache_key, query, kwargs))
+
+    async def _asearch_uncached(self, cache_key: str, query: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        query_embedding = await SearchExecutors.run('embedding', self._get_text_embedding, query)
+        return await SearchExecutors.run_db(
+            self._search_and_cache, cache_key, query, query_embedding, None, **options
         )
 
-        # Combine scores and prepare results
-        results = []
-        for product in queryset[:limit]:
-            combined_score = self._combine_scores(
-                float(product.text_rank or 0),
-                float(product.vector_rank or 0),
-                weights
-            )
+    def _use_image_query(self, image_query: Image) -> bool:
+        if image_query and not EmbeddingModelRegistry.vision_enabled():
+            logger.warning("Ignoring image query because image embeddings are disabled")
+            return False
+        return bool(image_query)
 
-            # Refresh signed URL if needed
-            if include_signed_urls:
-                product.refresh_signed_url()
-
-            result = {
-                "name": product.name,
-                "description": product.description,
-                "category": product.category,
-                "price": float(product.price),
-                "signed_url": product.signed_url,
-                "scores": {
-                    "text": float(product.text_rank or 0),
-                    "vector": float(product.vector_rank or 0),
-                    "hybrid": combined_score
-                }
+    def _use_result_cache(self) -> bool:
+        return getattr(settings, 'PRODUCT_SEARCH_RESULT_CACHE', True)
+
+    def _result_cache_key(self, query: str, options: Dict[str, Any]) -> str:
+        """Key a search by its normalized arguments and the current catalog version"""
+        arguments = {
+            "query": normalize_query(query),
+            "limit": options.get("limit", 10),
+            "category": options.get("category"),
+            "min_price": options.get("min_price"),
+            "max_price": options.get("max_price"),
+            "weights": options.get("weights"),
+            "include_signed_urls": bool(options.get("include_signed_urls")),
+            "ef_search": options.get("ef_search"),
+            "probes": options.get("probes"),
+            "fusion": options.get("fusion"),
+            "candidates": options.get("candidates"),
+        }
+        digest = hashlib.sha1(json.dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{CatalogVersion.get()}:{digest}"
+
+    def _cached_result(self, query: str, options: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Get the cache key for a search and its cached result, if any"""
+        key = self._result_cache_key(query, options)
+        return key, self.result_cache().get(key) if self._use_result_cache() else None
+
+    def _search_and_cache(self, cache_key: str, *args, **kwargs) -> Dict[str, Any]:
+        """Run _search_by_embedding and cache the result under cache_key"""
+        result = self._search_by_embedding(*args, **kwargs)
+        if self._use_result_cache():
+            self.result_cache().set(cache_key, result)
+        return result
+
+    @staticmethod
+    def _serialize_product(product: Product) -> Dict[str, Any]:
+        """Build the JSON-safe result entry for a product row from the hybrid query"""
+        return {
+            "id": str(product.id),  # UUID
+            "name": product.name,
+            "description": product.description,
+            "category": product.category,
+            "price": float(product.price),
+            "signed_url": product.signed_url,
+            "scores": {
+                "text": float(getattr(product, "text_score", None) or 0),
+                "vector": float(getattr(product, "vector_score", None) or 0),
+                "hybrid": float(getattr(product, "hybrid_score", None) or 0)
             }
+        }
+
+    def _search_by_embedding(
+        self,
+        query: str,
+        query_embedding: List[float],
+        image_embedding: List[float] = None,
+        limit: int = 10,
+        category: str = None,
+        min_price: float = None,
+        max_price: float = None,
+        weights: Dict[str, float] = None,
+        include_signed_urls: bool = False,
+        ef_search: int = None,
+        probes: int = None,
+        fusion: str = None,
+        candidates: int = None
+    ) -> Dict[str, Any]:
+        """Run the hybrid query for precomputed embeddings (see search for arguments)"""
+        weights = weights or {'text': 0.5, 'vector': 0.5}
+        fusion = fusion or getattr(settings, 'PRODUCT_SEARCH_FUSION', 'rrf')
+        candidates = candidates or getattr(settings, 'PRODUCT_SEARCH_CANDIDATES', 100)
+
+        params = {
+            "query": query,
+            "embedding": "[" + ",".join(str(x) for x in query_embedding) + "]",
+            "candidates": max(int(candidates), limit),
+            "limit": limit,
+            "text_weight": float(weights['text']),
+            "vector_weight": float(weights['vector']),
+            "rrf_k": getattr(settings, 'PRODUCT_SEARCH_RRF_K', 60),
+        }
+
+        # Filters applied to both candidate lists
+        filters = []
+        if category:
+            filters.append("category = %(category)s")
+            params["category"] = category
+        if min_price is not None:
+            filters.append("price >= %(min_price)s")
+            params["min_price"] = min_price
+        if max_price is not None:
+            filters.append("price <= %(max_price)s")
+            params["max_price"] = max_price
 
-            results.append(result)
+        sql = self._build_hybrid_sql(fusion, filters)
+        with span("search_query"), transaction.atomic():
+            self._apply_index_tuning(
+                ef_search, probes, candidates=params["candidates"], filtered=bool(filters)
+            )
+            products = list(Product.objects.raw(sql, params))
 
-        # Sort by combined score
-        results.sort(key=lambda x: x["scores"]["hybrid"], reverse=True)
+        # Reuse still-valid URLs; regenerate only near-expiry ones in one bulk_update
+        if include_signed_urls:
+            SignedUrlService.refresh(products)
+
+        # Prepare results, already ordered by hybrid score
+        results = [self._serialize_product(product) for product in products]
 
         return {
             "data": results,
             "metadata": {
-                "search_type": "hybrid" + (" + multimodal" if image_query else ""),
+                "search_type": "hybrid" + (" + multimodal" if image_embedding is not None else ""),
                 "total_results": len(results),
-                "weights": weights or {'text': 0.5, 'vector': 0.5}
+                "weights": weights,
+                "fusion": fusion
             }
         }
+
+
+register_collector("embedding_models", EmbeddingModelRegistry.stats)
+register_collector("embedding_cache", lambda: ProductSearchService.embedding_cache().stats())
+register_collector("search_result_cache", lambda: ProductSearchService.result_cache().stats())
+register_collector("embedding_batcher", lambda: ProductSearchService.embedding_batcher().stats())
+register_collector("search_executors", SearchExecutors.stats)
+register_collector("embedding_single_flight", ProductSearchService._embedding_flight.stats)
+register_collector("search_single_flight", ProductSearchService._search_flight.stats)
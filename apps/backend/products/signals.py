@@ -0,0 +1,52 @@
+import logging
+from django.db import connections
+from .cache import CatalogVersion
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+SEARCH_VECTOR_FUNCTION = 'products_product_search_vector_update'
+SEARCH_VECTOR_TRIGGER = 'products_product_search_vector_trigger'
+
+
+def install_search_vector_trigger(sender=None, using='default', **kwargs):
+    """Keep Product.search_vector in sync with name (A), description (B) and category (C)
+
+    Connected to post_migrate so the trigger is (re)installed on every migrate.
+    Skipped until the products table exists.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    if Product._meta.db_table not in connection.introspection.table_names():
+        logger.info("Products table not created yet; skipping search_vector trigger")
+        return
+
+    table = connection.ops.quote_name(Product._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {SEARCH_VECTOR_FUNCTION}() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B') ||
+                    setweight(to_tsvector('english', coalesce(NEW.category, '')), 'C');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+        """)
+        cursor.execute(f"DROP TRIGGER IF EXISTS {SEARCH_VECTOR_TRIGGER} ON {table};")
+        cursor.execute(f"""
+            CREATE TRIGGER {SEARCH_VECTOR_TRIGGER}
+            BEFORE INSERT OR UPDATE OF name, description, category ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {SEARCH_VECTOR_FUNCTION}();
+        """)
+    logger.info("Installed search_vector trigger")
+
+
+def bump_catalog_version(sender=None, **kwargs):
+    """Invalidate cached search results and answers when a product changes
+
+    Connected to Product post_save and post_delete.
+    """
+    CatalogVersion.bump()
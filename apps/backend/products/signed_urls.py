@@ -0,0 +1,75 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+from minio import Minio
+from config.metrics import span
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class SignedUrlService:
+    """Presigned image URLs with a shared MinIO client
+
+    URLs are stored on the product together with their expiry, reused while
+    still valid and regenerated only when they are about to expire.
+    """
+    _client: Optional[Minio] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def client(cls) -> Minio:
+        """Get the process-wide MinIO client"""
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    cls._client = Minio(
+                        f"{settings.MINIO_HOST}:{settings.MINIO_PORT}",
+                        access_key=settings.MINIO_ROOT_USER,
+                        secret_key=settings.MINIO_ROOT_PASSWORD,
+                        secure=settings.MINIO_USE_SSL,
+                        # A fixed region lets presigning skip the bucket location lookup
+                        region=getattr(settings, 'MINIO_REGION', 'us-east-1')
+                    )
+        return cls._client
+
+    @classmethod
+    def generate(cls, image_key: str) -> Tuple[str, timezone.datetime]:
+        """Generate a presigned URL and its expiry time for an object"""
+        ttl = timedelta(hours=getattr(settings, 'MINIO_SIGNED_URL_TTL_HOURS', 12))
+        expires_at = timezone.now() + ttl
+        url = cls.client().presigned_get_object(settings.MINIO_BUCKET_NAME, image_key, expires=ttl)
+        return url, expires_at
+
+    @classmethod
+    def needs_refresh(cls, product: Product) -> bool:
+        """Check whether a product's URL is missing or expires within the refresh margin"""
+        if not product.signed_url or product.signed_url_expires_at is None:
+            return True
+        margin = timedelta(minutes=getattr(settings, 'MINIO_SIGNED_URL_REFRESH_MARGIN_MINUTES', 60))
+        return product.signed_url_expires_at <= timezone.now() + margin
+
+    @classmethod
+    def refresh(cls, products: Iterable[Product], force: bool = False) -> List[Product]:
+        """Regenerate URLs for products that need it and save them in one bulk_update
+
+        Returns the products whose URLs were regenerated.
+        """
+        with span("signed_urls"):
+            refreshed = []
+            for product in products:
+                if not force and not cls.needs_refresh(product):
+                    continue
+                try:
+                    product.signed_url, product.signed_url_expires_at = cls.generate(product.image_key)
+                    refreshed.append(product)
+                except Exception as e:
+                    logger.error(f"Error generating signed URL for {product.image_key}: {str(e)}")
+
+            if refreshed:
+                Product.objects.bulk_update(refreshed, ['signed_url', 'signed_url_expires_at'])
+                logger.debug(f"Refreshed {len(refreshed)} signed URLs")
+            return refreshed